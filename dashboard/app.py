@@ -1,6 +1,7 @@
 import sqlite3
 import json
 import os
+import re
 from flask import Flask, render_template, request, redirect, url_for, flash
 
 app = Flask(__name__)
@@ -8,6 +9,10 @@ app.secret_key = os.getenv("DASHBOARD_SECRET_KEY", "dev-secret-change-me")
 
 DB_PATH = os.getenv("DASHBOARD_DB_PATH", "dashboard.db")
 
+# Same shape discord.Webhook.from_url accepts
+WEBHOOK_URL_RE = re.compile(
+    r"discord(?:app)?\.com/api/webhooks/[0-9]{17,20}/[A-Za-z0-9.\-_]{60,}")
+
 
 def get_db():
     """Get a database connection."""
@@ -25,7 +30,8 @@ def init_db():
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL,
         discord_channel_id TEXT NOT NULL,
-        bot_token TEXT NOT NULL,
+        bot_token TEXT NOT NULL DEFAULT '',
+        webhook_url TEXT DEFAULT '',
         allowed_severities TEXT DEFAULT '[0,1,2,3,4,5]',
         include_substrings TEXT DEFAULT '[]',
         exclude_substrings TEXT DEFAULT '[]',
@@ -41,7 +47,22 @@ def init_db():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (channel_config_id) REFERENCES channels(id)
     );
+
+    CREATE INDEX IF NOT EXISTS idx_message_tracking_channel_severity
+        ON message_tracking (channel_config_id, severity);
+
+    CREATE TABLE IF NOT EXISTS message_fingerprints (
+        channel_config_id INTEGER NOT NULL,
+        severity INTEGER NOT NULL,
+        fingerprint TEXT NOT NULL,
+        PRIMARY KEY (channel_config_id, severity),
+        FOREIGN KEY (channel_config_id) REFERENCES channels(id)
+    );
 """)
+    # Databases created before webhook delivery existed
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(channels)")}
+    if "webhook_url" not in columns:
+        conn.execute("ALTER TABLE channels ADD COLUMN webhook_url TEXT DEFAULT ''")
     conn.commit()
     conn.close()
 
@@ -68,16 +89,23 @@ def channel_new():
 # ─── Create channel ─────────────────────────────────────────────
 @app.route("/channel/create", methods=["POST"])
 def channel_create():
+    if not _has_destination(request.form):
+        flash("Enter a bot token or a webhook URL", "error")
+        return redirect(url_for("channel_new"))
+    if not _valid_webhook_url(request.form):
+        flash("That is not a Discord webhook URL", "error")
+        return redirect(url_for("channel_new"))
     conn = get_db()
     conn.execute(
         """INSERT INTO channels
-           (name, discord_channel_id, bot_token, allowed_severities,
+           (name, discord_channel_id, bot_token, webhook_url, allowed_severities,
             include_substrings, exclude_substrings, host_ignores, enabled)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
         (
             request.form["name"],
             request.form["discord_channel_id"],
-            request.form["bot_token"],
+            request.form.get("bot_token", "").strip(),
+            request.form.get("webhook_url", "").strip(),
             _parse_severities(request.form.getlist("severity")),
             _parse_comma_list(request.form.get("include_substrings", "")),
             _parse_comma_list(request.form.get("exclude_substrings", "")),
@@ -108,16 +136,23 @@ def channel_edit(channel_id):
 # ─── Update channel ─────────────────────────────────────────────
 @app.route("/channel/<int:channel_id>/update", methods=["POST"])
 def channel_update(channel_id):
+    if not _has_destination(request.form):
+        flash("Enter a bot token or a webhook URL", "error")
+        return redirect(url_for("channel_edit", channel_id=channel_id))
+    if not _valid_webhook_url(request.form):
+        flash("That is not a Discord webhook URL", "error")
+        return redirect(url_for("channel_edit", channel_id=channel_id))
     conn = get_db()
     conn.execute(
         """UPDATE channels SET
-           name=?, discord_channel_id=?, bot_token=?, allowed_severities=?,
+           name=?, discord_channel_id=?, bot_token=?, webhook_url=?, allowed_severities=?,
            include_substrings=?, exclude_substrings=?, host_ignores=?, enabled=?
            WHERE id=?""",
         (
             request.form["name"],
             request.form["discord_channel_id"],
-            request.form["bot_token"],
+            request.form.get("bot_token", "").strip(),
+            request.form.get("webhook_url", "").strip(),
             _parse_severities(request.form.getlist("severity")),
             _parse_comma_list(request.form.get("include_substrings", "")),
             _parse_comma_list(request.form.get("exclude_substrings", "")),
@@ -138,6 +173,8 @@ def channel_delete(channel_id):
     conn = get_db()
     conn.execute(
         "DELETE FROM message_tracking WHERE channel_config_id = ?", (channel_id,))
+    conn.execute(
+        "DELETE FROM message_fingerprints WHERE channel_config_id = ?", (channel_id,))
     conn.execute("DELETE FROM channels WHERE id = ?", (channel_id,))
     conn.commit()
     conn.close()
@@ -146,6 +183,17 @@ def channel_delete(channel_id):
 
 
 # ─── Helper functions ────────────────────────────────────────────
+def _has_destination(form) -> bool:
+    """A channel is delivered through its bot token or its webhook URL."""
+    return bool(form.get("bot_token", "").strip() or form.get("webhook_url", "").strip())
+
+
+def _valid_webhook_url(form) -> bool:
+    """An empty webhook URL is fine; otherwise it has to be a Discord webhook."""
+    url = form.get("webhook_url", "").strip()
+    return not url or bool(WEBHOOK_URL_RE.search(url))
+
+
 def _parse_severities(values: list) -> str:
     """Convert form checkbox values like ['1','3','4'] → '[1,3,4]' JSON."""
     ints = sorted({int(v) for v in values if v.isdigit() and 0 <= int(v) <= 5})
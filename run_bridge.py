@@ -12,7 +12,7 @@ import os
 from typing import List, Tuple
 from dotenv import load_dotenv
 
-from zabbix_minimal.api import ZabbixClint
+from zabbix_minimal.api import AsyncZabbixClint, CacheStore
 from zabbix_minimal.models import Problem
 from zabbix_minimal.monitor import ZabbixMonitor
 from zabbix_minimal.discord_bridge import DiscordBridge
@@ -29,44 +29,26 @@ ZABBIX_TOKEN = os.getenv("ZABBIX_TOKEN")
 HOST_GROUP_ID = os.getenv("HOST_GROUP_ID", "22")
 DB_PATH = os.getenv("DASHBOARD_DB_PATH", "dashboard.db")
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "30"))  # seconds
+BRIDGE_MODE = os.getenv("BRIDGE_MODE", "reconcile")     # reconcile | replace | swap
+ENRICH_STRATEGY = os.getenv("ENRICH_STRATEGY", "trigger")  # trigger | event
+INCREMENTAL_POLL = os.getenv("INCREMENTAL_POLL", "1") == "1"
+FULL_RESYNC_EVERY = int(os.getenv("FULL_RESYNC_EVERY", "10"))  # cycles
+DISCORD_REST_ONLY = os.getenv("DISCORD_REST_ONLY", "1") == "1"  # no gateway websocket
+MAX_CONCURRENT_REFRESHES = int(os.getenv("MAX_CONCURRENT_REFRESHES", "8"))
+TRACKING_FLUSH_INTERVAL = float(os.getenv("TRACKING_FLUSH_INTERVAL", "5"))  # seconds
+METADATA_CACHE_PATH = os.getenv("METADATA_CACHE_PATH")  # optional, e.g. metadata_cache.db
 
 
-def enrich_problems(
+async def enrich_problems(
     problems: List[Problem],
-    zabbix: ZabbixClint,
+    zabbix: AsyncZabbixClint,
 ) -> List[Tuple[Problem, str, str]]:
     """
     Attach hostname and IP to each problem.
     Returns list of (problem, host_name, ip) tuples.
     """
-    # 1. Fetch hosts for all event IDs in one batch call
-    event_ids = [p.eventid for p in problems]
-    event_host_map = zabbix.get_event_hosts(event_ids)  # {eventid: [Host]}
-
-    # 2. Attach hosts to problems
-    for problem in problems:
-        if problem.eventid in event_host_map:
-            problem.hosts = event_host_map[problem.eventid]
-
-    # 3. Collect all unique host IDs
-    all_host_ids = list({
-        h.hostid
-        for p in problems
-        for h in p.hosts
-    })
-
-    # 4. Fetch IPs for all hosts in one batch call
-    ip_map = zabbix.get_host_ips(all_host_ids)   # {hostid: "ip"}
-
-    # 5. Build enriched list
-    result = []
-    for problem in problems:
-        host = problem.primary_host
-        host_name = host.name if host else "Unknown"
-        ip = ip_map.get(host.hostid, "N/A") if host else "N/A"
-        result.append((problem, host_name, ip))
-
-    return result
+    # Resolved through trigger objectids in one batched round trip by default
+    return await zabbix.get_problems_meta(problems, strategy=ENRICH_STRATEGY)
 
 
 async def main():
@@ -75,35 +57,56 @@ async def main():
         return
 
     # 1. Create Zabbix client
-    client = ZabbixClint(ZABBIX_URL, ZABBIX_TOKEN, host_group_id=HOST_GROUP_ID)
-    if not client.is_connected():
+    client = AsyncZabbixClint(ZABBIX_URL, ZABBIX_TOKEN, host_group_id=HOST_GROUP_ID)
+    if not await client.is_connected():
         logger.error("Cannot connect to Zabbix")
+        await client.close()
         return
     logger.info("Connected to Zabbix ✓")
 
+    # Warm host/IP caches from the previous run, if persistence is enabled
+    cache_store = CacheStore(METADATA_CACHE_PATH) if METADATA_CACHE_PATH else None
+    if cache_store:
+        client.load_caches(cache_store)
+
     # 2. Create monitor and bridge
-    monitor = ZabbixMonitor(client)
-    bridge = DiscordBridge(DB_PATH)
+    monitor = ZabbixMonitor(
+        client,
+        incremental=INCREMENTAL_POLL,
+        full_resync_every=FULL_RESYNC_EVERY,
+    )
+    bridge = DiscordBridge(
+        DB_PATH,
+        mode=BRIDGE_MODE,
+        max_concurrency=MAX_CONCURRENT_REFRESHES,
+        rest_only=DISCORD_REST_ONLY,
+        flush_interval=TRACKING_FLUSH_INTERVAL,
+    )
     logger.info(f"Bridge ready, polling every {POLL_INTERVAL}s...")
 
     # 3. Poll loop
-    while True:
-        try:
-            # We fetch exactly what is active right now
-            _, _, current = monitor.poll_once()
-
-            if current:
-                logger.debug(f"{len(current)} active problems. Refreshing Discord batches...")
-                problems_with_meta = enrich_problems(current, client)
-                await bridge.process_all_channels(problems_with_meta)
-            else:
-                logger.debug("No active problems. Clearing any leftover Discord messages...")
-                await bridge.process_all_channels([])
-
-        except Exception:
-            logger.exception("Error in poll cycle")
-
-        await asyncio.sleep(POLL_INTERVAL)
+    try:
+        while True:
+            try:
+                await monitor.poll_once_async()
+                await bridge.sync(
+                    monitor.snapshot(), lambda problems: enrich_problems(problems, client))
+
+                if cache_store:
+                    client.save_caches(cache_store)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Metadata cache stats: {client.cache_stats()}")
+                    logger.debug(f"Discord scheduler stats: {bridge.scheduler.stats()}")
+
+            except Exception:
+                logger.exception("Error in poll cycle")
+
+            await asyncio.sleep(POLL_INTERVAL)
+    finally:
+        if cache_store:
+            client.save_caches(cache_store)
+        await bridge.close()
+        await client.close()
 
 
 if __name__ == "__main__":
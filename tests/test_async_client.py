@@ -0,0 +1,105 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+
+from zabbix_minimal.api import AsyncZabbixClint
+from zabbix_minimal.models import Problem
+from zabbix_minimal.monitor import ZabbixMonitor
+
+
+def test_async_client_invalid_url():
+    with pytest.raises(ValueError):
+        AsyncZabbixClint("ftp://invalid-url.com", "token", ["22"])
+
+
+def test_async_get_current_problems():
+    client = AsyncZabbixClint("http://example.com", "token", ["22"])
+
+    fake_problem = [{
+        "eventid": "1",
+        "name": "CPU High",
+        "severity": "3",
+        "acknowledged": "0",
+        "clock": "1234567890",
+    }]
+
+    with patch.object(client, "_call", AsyncMock(return_value=fake_problem)) as mock_call:
+        problems = asyncio.run(client.get_current_problems())
+
+    assert isinstance(problems[0], Problem)
+    assert problems[0].severity == 3
+    method, params = mock_call.call_args.args
+    assert method == "problem.get"
+    assert params["groupids"] == ["22"]
+
+
+def test_async_event_hosts_are_cached():
+    client = AsyncZabbixClint("http://example.com", "token")
+
+    fake_event_hosts = [{
+        "eventid": "1",
+        "hosts": [{"hostid": "10", "name": "Server1", "status": "0"}]
+    }]
+
+    with patch.object(client, "_call", AsyncMock(return_value=fake_event_hosts)) as mock_call:
+        first = asyncio.run(client.get_event_hosts(["1"]))
+        second = asyncio.run(client.get_event_hosts(["1"]))
+
+    assert mock_call.call_count == 1
+    assert first["1"][0].name == "Server1"
+    assert second == first
+
+
+def test_async_host_ips_prefers_main_interface():
+    client = AsyncZabbixClint("http://example.com", "token")
+
+    fake_hosts = [{
+        "hostid": "10",
+        "interfaces": [{"ip": "10.0.0.2", "main": "0"}, {"ip": "10.0.0.1", "main": "1"}]
+    }]
+
+    with patch.object(client, "_call", AsyncMock(return_value=fake_hosts)):
+        ips = asyncio.run(client.get_host_ips(["10"]))
+
+    assert ips == {"10": "10.0.0.1"}
+
+
+def _fake_response(status, body):
+    response = MagicMock()
+    response.status = status
+    response.json = AsyncMock(return_value=body)
+    response.raise_for_status = MagicMock()
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=response)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx
+
+
+def test_async_call_retries_transient_status():
+    client = AsyncZabbixClint("http://example.com", "token", backoff_factor=0)
+
+    session = MagicMock()
+    session.post.side_effect = [
+        _fake_response(503, {}),
+        _fake_response(200, {"result": ["ok"]}),
+    ]
+
+    with patch.object(client, "_get_session", return_value=session):
+        result = asyncio.run(client._call("apiinfo.version"))
+
+    assert result == ["ok"]
+    assert session.post.call_count == 2
+
+
+def test_monitor_poll_once_async():
+    mock_client = MagicMock()
+    p1 = Problem(eventid="1", name="P1", severity=1,
+                 acknowledged=False, clock=123)
+    mock_client.get_current_problems = AsyncMock(return_value=[p1])
+
+    monitor = ZabbixMonitor(mock_client)
+    new, resolved, current = asyncio.run(monitor.poll_once_async())
+
+    assert [p.eventid for p in new] == ["1"]
+    assert resolved == []
+    assert current == [p1]
@@ -0,0 +1,142 @@
+from unittest.mock import patch
+import pytest
+
+from zabbix_minimal.api.cache import HostCache
+from zabbix_minimal.api.cache_store import CacheStore
+from zabbix_minimal.api import ZabbixClint
+from zabbix_minimal.models import Host
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    with patch("zabbix_minimal.api.cache.time.monotonic", side_effect=lambda: now[0]):
+        yield now
+
+
+def test_entries_expire_per_key(clock):
+    cache = HostCache(ttl_seconds=100, refresh_ahead=0)
+    cache.update({"a": 1})
+    clock[0] += 60
+    cache.update({"b": 2})
+    clock[0] += 50
+
+    # "a" is 110s old and gone, "b" is 50s old and still served
+    assert cache.get_many(["a", "b"]) == {"b": 2}
+    assert cache.get_missing(["a", "b"]) == ["a"]
+
+
+def test_refresh_ahead_reports_but_still_serves(clock):
+    cache = HostCache(ttl_seconds=100, refresh_ahead=0.2)
+    with patch("zabbix_minimal.api.cache.random.random", return_value=1.0):
+        cache.update({"a": 1})
+
+    clock[0] += 79
+    assert cache.get_missing(["a"]) == []
+
+    clock[0] += 2  # inside the refresh-ahead window, not expired
+    assert cache.get_missing(["a"]) == ["a"]
+    assert cache.get_many(["a"]) == {"a": 1}
+
+
+def test_lru_bound_evicts_least_recently_used(clock):
+    cache = HostCache(ttl_seconds=100, max_size=2)
+    cache.update({"a": 1, "b": 2})
+    cache.get_many(["a"])
+    cache.update({"c": 3})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert cache.evictions == 1
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = HostCache(ttl_seconds=100)
+    cache.update({"a": 1})
+    cache.get_missing(["a", "b"])
+    cache.get_many(["a", "b"])
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_negative_entries_are_not_missing_until_they_expire(clock):
+    cache = HostCache(ttl_seconds=300, negative_ttl_seconds=60)
+    cache.update_negative(["gone"])
+
+    assert cache.get_missing(["gone"]) == []
+    assert cache.get_many(["gone"]) == {}
+    assert cache.stats()["negatives"] == 1
+
+    clock[0] += 61
+    assert cache.get_missing(["gone"]) == ["gone"]
+    assert cache.stats()["negatives"] == 0
+
+
+def test_cache_store_round_trip_keeps_expiry(tmp_path):
+    store = CacheStore(str(tmp_path / "cache.db"))
+    cache = HostCache(ttl_seconds=300)
+    cache.update({"10": "10.0.0.1"})
+    cache.update_negative(["404"])
+    store.save("host_ip", cache)
+
+    warm = HostCache(ttl_seconds=300)
+    store.load("host_ip", warm)
+
+    assert warm.get_many(["10"]) == {"10": "10.0.0.1"}
+    assert warm.get_missing(["10", "404", "11"]) == ["11"]
+    assert abs(warm.cache["10"].expires_at - cache.cache["10"].expires_at) < 1
+
+
+def test_cache_store_saves_only_dirty_entries(tmp_path):
+    store = CacheStore(str(tmp_path / "cache.db"))
+    cache = HostCache(ttl_seconds=300)
+    cache.update({"10": "10.0.0.1"})
+    store.save("host_ip", cache)
+
+    assert cache.export_dirty() == []
+
+
+def test_client_warm_restart_needs_no_api_calls(tmp_path):
+    store = CacheStore(str(tmp_path / "cache.db"))
+    client = ZabbixClint("http://example.com", "token")
+    client.event_host_cache.update({"1": [Host(hostid="10", name="SW1", status=0)]})
+    client.host_ip_cache.update({"10": "10.0.0.1"})
+    client.save_caches(store)
+
+    restarted = ZabbixClint("http://example.com", "token")
+    restarted.load_caches(store)
+
+    with patch.object(restarted, "_call") as mock_call, \
+            patch.object(restarted, "_call_many") as mock_many:
+        event_host_map, ip_map = restarted.get_hosts_and_ips(["1"])
+
+    mock_call.assert_not_called()
+    mock_many.assert_not_called()
+    assert event_host_map["1"][0].name == "SW1"
+    assert ip_map == {"10": "10.0.0.1"}
+
+
+def test_dirty_keys_stay_bounded_without_persistence(clock):
+    cache = HostCache(ttl_seconds=100, max_size=10)
+    for i in range(1000):
+        cache.update({str(i): i})
+    cache.update_negative([f"gone-{i}" for i in range(1000)])
+
+    assert len(cache._dirty) <= 10
+    clock[0] += 101
+    cache.get_missing(list(cache.cache))
+    assert cache._dirty == set()
+
+
+def test_cold_lookup_counts_only_misses():
+    client = ZabbixClint("http://example.com", "token")
+    with patch.object(client, "_call", return_value=[
+        {"hostid": "10", "interfaces": [{"ip": "10.0.0.1", "main": "1"}]},
+    ]):
+        assert client.get_host_ips(["10"]) == {"10": "10.0.0.1"}
+        assert client.get_host_ips(["10"]) == {"10": "10.0.0.1"}
+
+    stats = client.host_ip_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
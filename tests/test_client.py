@@ -1,7 +1,7 @@
 from unittest.mock import patch, MagicMock
 import pytest
 from zabbix_minimal.api import ZabbixClint
-from zabbix_minimal.models import Problem
+from zabbix_minimal.models import Problem, Host
 
 
 def test_zabbix_client_invalid_url():
@@ -72,3 +72,151 @@ def test_is_connected_failure():
 
     with patch.object(client.session, "post", side_effect=Exception("Connection error")):
         assert client.is_connected() is False
+
+
+def test_call_many_maps_responses_by_id():
+    """Batch responses may come back in any order"""
+
+    client = ZabbixClint("http://10.10.10.10", "token", ["22"])
+
+    mock_response = MagicMock()
+    mock_response.raise_for_status.return_value = None
+    mock_response.json.return_value = [
+        {"jsonrpc": "2.0", "result": ["hosts"], "id": 2},
+        {"jsonrpc": "2.0", "result": ["events"], "id": 1},
+    ]
+
+    with patch.object(client.session, "post", return_value=mock_response) as mock_post:
+        results = client._call_many([("event.get", {}), ("host.get", {})])
+
+    assert results == [["events"], ["hosts"]]
+    payload = mock_post.call_args.kwargs["json"]
+    assert [call["id"] for call in payload] == [1, 2]
+
+
+def test_call_many_raises_on_error_entry():
+    client = ZabbixClint("http://10.10.10.10", "token", ["22"])
+
+    mock_response = MagicMock()
+    mock_response.raise_for_status.return_value = None
+    mock_response.json.return_value = [
+        {"jsonrpc": "2.0", "result": [], "id": 1},
+        {"jsonrpc": "2.0", "error": {"message": "No permissions"}, "id": 2},
+    ]
+
+    with patch.object(client.session, "post", return_value=mock_response):
+        with pytest.raises(RuntimeError):
+            client._call_many([("event.get", {}), ("host.get", {})])
+
+
+def test_get_hosts_and_ips_batches_known_hosts():
+    """IPs of hosts known from cached events are fetched in the same batch as new events"""
+
+    client = ZabbixClint("http://example.com", "token", ["22"])
+    client.event_host_cache.update({
+        "1": [Host(hostid="10", name="Server1", status=0)],
+    })
+
+    fake_events = [{"eventid": "2", "hosts": [{"hostid": "10", "name": "Server1", "status": "0"}]}]
+    fake_hosts = [{"hostid": "10", "interfaces": [{"ip": "10.0.0.1", "main": "1"}]}]
+
+    with patch.object(client, "_call_many", return_value=[fake_events, fake_hosts]) as mock_many, \
+            patch.object(client, "_call") as mock_call:
+        event_host_map, ip_map = client.get_hosts_and_ips(["1", "2"])
+
+    methods = [method for method, _ in mock_many.call_args.args[0]]
+    assert methods == ["event.get", "host.get"]
+    mock_call.assert_not_called()
+    assert event_host_map["2"][0].name == "Server1"
+    assert ip_map == {"10": "10.0.0.1"}
+
+
+def test_get_problems_meta_trigger_strategy_single_batch():
+    """Problems resolve to hosts and IPs through their trigger objectids in one batch"""
+
+    client = ZabbixClint("http://example.com", "token", ["22"])
+    problems = [
+        Problem(eventid="1", name="Link down", severity=4,
+                acknowledged=False, clock=1, objectid="500"),
+        Problem(eventid="2", name="Link flapping", severity=3,
+                acknowledged=False, clock=1, objectid="500"),
+    ]
+
+    fake_triggers = [{"triggerid": "500", "hosts": [{"hostid": "10", "name": "SW1", "status": "0"}]}]
+    fake_hosts = [{"hostid": "10", "interfaces": [{"ip": "10.0.0.1", "main": "1"}]}]
+
+    with patch.object(client, "_call_many", return_value=[fake_triggers, fake_hosts]) as mock_many, \
+            patch.object(client, "_call") as mock_call:
+        result = client.get_problems_meta(problems)
+
+    methods = [method for method, _ in mock_many.call_args.args[0]]
+    assert methods == ["trigger.get", "host.get"]
+    mock_call.assert_not_called()
+    assert [(p.eventid, host, ip) for p, host, ip in result] == [
+        ("1", "SW1", "10.0.0.1"), ("2", "SW1", "10.0.0.1")]
+    assert result[0][0].primary_host.hostid == "10"
+    # The monitor's problems are left alone; enrichment returns copies
+    assert not problems[0].hosts
+
+    # Second cycle is served from the objectid cache
+    with patch.object(client, "_call_many") as mock_many:
+        client.get_problems_meta(problems)
+    mock_many.assert_not_called()
+
+
+def test_get_problem_changes_single_batch():
+    """New problems and the resolved check go out in one batch"""
+
+    client = ZabbixClint("http://example.com", "token", ["22"])
+
+    ids_only = [
+        {"eventid": "2", "name": "Old", "severity": "2"},
+        {"eventid": "3", "name": "New", "severity": "4"},
+    ]
+    fresh = [{"eventid": "3", "name": "New", "severity": "4", "clock": "1"}]
+
+    with patch.object(client, "_call_many", return_value=[ids_only, fresh]) as mock_many, \
+            patch.object(client, "_call") as mock_call:
+        new, resolved_ids, known_states = client.get_problem_changes({"1", "2"}, "3")
+
+    calls = mock_many.call_args.args[0]
+    assert calls[0][1]["output"] == ["eventid", "name", "severity"]
+    assert calls[1][1]["eventid_from"] == "3"
+    mock_call.assert_not_called()
+    assert [p.eventid for p in new] == ["3"]
+    assert resolved_ids == {"1"}
+    assert list(known_states) == ["2"]
+    assert known_states["2"].quick_state == ("Old", 2)
+
+
+def test_get_problem_changes_fetches_older_stragglers():
+    """An active problem older than eventid_from (e.g. unsuppressed) is fetched by id"""
+
+    client = ZabbixClint("http://example.com", "token", ["22"])
+
+    ids_only = [{"eventid": "1"}, {"eventid": "2"}]
+    straggler = [{"eventid": "2", "name": "Unsuppressed", "severity": "3", "clock": "1"}]
+
+    with patch.object(client, "_call_many", return_value=[ids_only, []]), \
+            patch.object(client, "_call", return_value=straggler) as mock_call:
+        new, resolved_ids, _ = client.get_problem_changes({"1"}, "5")
+
+    assert mock_call.call_args.args[1]["eventids"] == ["2"]
+    assert [p.eventid for p in new] == ["2"]
+    assert resolved_ids == set()
+
+
+def test_event_hosts_not_returned_are_negatively_cached():
+    """An event the API does not return stops generating event.get calls"""
+
+    client = ZabbixClint("http://example.com", "token", ["22"])
+
+    fake_event_hosts = [{"eventid": "1", "hosts": []}]
+
+    with patch.object(client, "_call", return_value=fake_event_hosts) as mock_call:
+        client.get_event_hosts(["1", "404"])
+        result = client.get_event_hosts(["1", "404"])
+
+    assert mock_call.call_count == 1
+    assert "404" not in result
+    assert client.cache_stats()["event_host"]["negatives"] == 1
@@ -0,0 +1,579 @@
+import asyncio
+import sqlite3
+import pytest
+
+from zabbix_minimal.discord_bridge import DiscordBridge
+from zabbix_minimal.discord.sender import DiscordRestBot, DiscordWebhookBot, _pack_messages
+from zabbix_minimal.models import Problem, Host
+from zabbix_minimal.monitor import MonitorSnapshot
+from zabbix_minimal.tracking_store import TrackingStore
+
+
+SCHEMA = """
+CREATE TABLE channels (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    discord_channel_id TEXT NOT NULL,
+    bot_token TEXT NOT NULL,
+    allowed_severities TEXT DEFAULT '[0,1,2,3,4,5]',
+    include_substrings TEXT DEFAULT '[]',
+    exclude_substrings TEXT DEFAULT '[]',
+    host_ignores TEXT DEFAULT '[]',
+    enabled INTEGER DEFAULT 1
+);
+CREATE TABLE message_tracking (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel_config_id INTEGER NOT NULL,
+    severity INTEGER NOT NULL,
+    discord_message_id TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class FakeBot:
+    """Records every Discord call instead of talking to Discord."""
+
+    def __init__(self):
+        self.calls = []
+        self._next_id = 1000
+
+    async def send_chunk(self, channel_id, chunk, severity, chunk_index, total_chunks):
+        self._next_id += 1
+        self.calls.append(("send", self._next_id))
+        return self._next_id
+
+    async def edit_chunk(self, channel_id, message_id, chunk, severity, chunk_index, total_chunks):
+        self.calls.append(("edit", message_id))
+        return True
+
+    async def send_batch(self, channel_id, problems_with_meta, severity):
+        ids = []
+        for chunk in _pack_messages(problems_with_meta):
+            msg_id = await self.send_chunk(channel_id, chunk, severity, 0, 1)
+            if msg_id is not None:
+                ids.append(msg_id)
+        return ids
+
+    async def delete_messages(self, channel_id, message_ids, severity=0):
+        self.calls.append(("delete", list(message_ids)))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "dashboard.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+    return path
+
+
+def channel_config(allowed="[4]"):
+    return {
+        "id": 1,
+        "name": "Network",
+        "discord_channel_id": "42",
+        "bot_token": "token",
+        "allowed_severities": allowed,
+        "include_substrings": "[]",
+        "exclude_substrings": "[]",
+        "host_ignores": "[]",
+    }
+
+
+def make_meta(count, severity=4, start=0):
+    host = Host(hostid="h1", name="Router-01", status=0)
+    # Long names so a handful of problems fills a whole message
+    return [
+        (Problem(eventid=str(i), name=f"Problem {i} " + "x" * 900, severity=severity,
+                 acknowledged=False, clock=1000, hosts=[host]), "Router-01", "10.0.0.1")
+        for i in range(start, start + count)
+    ]
+
+
+PER_MESSAGE = sum(len(embed) for embed in _pack_messages(make_meta(50))[0])
+
+
+def make_bridge(db_path, **kwargs):
+    bridge = DiscordBridge(db_path, **kwargs)
+    bot = FakeBot()
+    bridge._get_bot = lambda token: bot
+    return bridge, bot
+
+
+def test_unchanged_cycle_makes_no_discord_calls(db_path):
+    bridge, bot = make_bridge(db_path)
+    meta = make_meta(PER_MESSAGE * 2)
+
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    assert [c[0] for c in bot.calls] == ["send", "send"]
+
+    bot.calls.clear()
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    assert bot.calls == []
+
+
+def test_unchanged_group_skipped_after_restart(db_path):
+    bridge, bot = make_bridge(db_path)
+    meta = make_meta(5)
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    asyncio.run(bridge.close())  # shutdown flushes tracking and fingerprints
+
+    restarted, bot = make_bridge(db_path)
+    tracking_reads = []
+    restarted._get_tracked_messages = lambda *a: tracking_reads.append(a)
+    asyncio.run(restarted.refresh_channel(channel_config(), meta))
+    assert tracking_reads == []
+    assert bot.calls == []
+
+
+def test_close_writes_tracking_even_if_a_bot_fails_to_close(db_path):
+    bridge, bot = make_bridge(db_path, flush_interval=3600)
+    asyncio.run(bridge.refresh_channel(channel_config(), make_meta(3)))
+    tracked = bridge._get_tracked_messages(1, 4)
+
+    async def failing_close():
+        raise RuntimeError("session already closed")
+
+    bot.close = failing_close
+    bridge._bots["token"] = bot
+    with pytest.raises(RuntimeError):
+        asyncio.run(bridge.close())
+
+    assert TrackingStore(db_path).get_messages(1, 4) == tracked
+
+
+def test_tracking_is_flushed_in_the_background(db_path):
+    bridge, bot = make_bridge(db_path, flush_interval=0.01)
+
+    async def cycle():
+        await bridge.refresh_channel(channel_config(), make_meta(3))
+        committed = TrackingStore(db_path).get_messages(1, 4)
+        await asyncio.sleep(0.05)
+        return committed
+
+    assert asyncio.run(cycle()) == []
+    assert TrackingStore(db_path).get_messages(1, 4) == [bot.calls[0][1]]
+
+
+def test_failed_send_is_retried_next_cycle(db_path):
+    bridge, bot = make_bridge(db_path)
+    real_send = bot.send_chunk
+
+    async def failing_send(*args):
+        return None
+
+    bot.send_chunk = failing_send
+    asyncio.run(bridge.refresh_channel(channel_config(), make_meta(3)))
+    assert bridge._load_fingerprints().get((1, 4)) is None
+
+    bot.send_chunk = real_send
+    asyncio.run(bridge.refresh_channel(channel_config(), make_meta(3)))
+    assert [c[0] for c in bot.calls] == ["send"]
+    assert (1, 4) in bridge._load_fingerprints()
+
+
+def test_only_changed_chunk_is_edited(db_path):
+    bridge, bot = make_bridge(db_path)
+    meta = make_meta(PER_MESSAGE * 2)
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    first_ids = bridge._get_tracked_messages(1, 4)
+
+    bot.calls.clear()
+    changed = meta[:PER_MESSAGE] + make_meta(PER_MESSAGE, start=500)
+    asyncio.run(bridge.refresh_channel(channel_config(), changed))
+
+    assert bot.calls == [("edit", first_ids[1])]
+    assert bridge._get_tracked_messages(1, 4) == first_ids
+
+
+def test_failed_edit_keeps_the_message_and_is_retried(db_path):
+    bridge, bot = make_bridge(db_path)
+    meta = make_meta(PER_MESSAGE * 2)
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    first_ids = bridge._get_tracked_messages(1, 4)
+    real_edit = bot.edit_chunk
+
+    async def failing_edit(channel_id, message_id, *args):
+        bot.calls.append(("edit", message_id))
+        return None  # e.g. a 503 or a timeout
+
+    bot.edit_chunk = failing_edit
+    bot.calls.clear()
+    changed = meta[:PER_MESSAGE] + make_meta(PER_MESSAGE, start=500)
+    asyncio.run(bridge.refresh_channel(channel_config(), changed))
+
+    # No delete and resend: the old message stays, and the group is retried
+    assert bot.calls == [("edit", first_ids[1])]
+    assert bridge._get_tracked_messages(1, 4) == first_ids
+    assert bridge._load_fingerprints().get((1, 4)) is None
+
+    bot.edit_chunk = real_edit
+    bot.calls.clear()
+    asyncio.run(bridge.refresh_channel(channel_config(), changed))
+    assert bot.calls == [("edit", first_ids[1])]
+    assert (1, 4) in bridge._load_fingerprints()
+
+
+def test_message_deleted_in_discord_is_resent_without_delete(db_path):
+    bridge, bot = make_bridge(db_path)
+    meta = make_meta(PER_MESSAGE * 2)
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    first_ids = bridge._get_tracked_messages(1, 4)
+
+    async def gone(channel_id, message_id, *args):
+        bot.calls.append(("edit", message_id))
+        return False  # NotFound
+
+    bot.edit_chunk = gone
+    bot.calls.clear()
+    changed = meta[:PER_MESSAGE] + make_meta(PER_MESSAGE, start=500)
+    asyncio.run(bridge.refresh_channel(channel_config(), changed))
+
+    assert [kind for kind, _ in bot.calls] == ["edit", "send"]
+    assert bridge._get_tracked_messages(1, 4) == [first_ids[0], bot.calls[1][1]]
+
+
+def test_surplus_chunks_are_deleted(db_path):
+    bridge, bot = make_bridge(db_path)
+    asyncio.run(bridge.refresh_channel(channel_config(), make_meta(PER_MESSAGE * 3)))
+    first_ids = bridge._get_tracked_messages(1, 4)
+
+    bot.calls.clear()
+    asyncio.run(bridge.refresh_channel(channel_config(), make_meta(PER_MESSAGE)))
+
+    # Chunk total changed (1/3 → 1/1) so the first message is edited, the rest removed
+    assert ("edit", first_ids[0]) in bot.calls
+    assert ("delete", first_ids[1:]) in bot.calls
+    assert bridge._get_tracked_messages(1, 4) == first_ids[:1]
+
+
+def test_replace_mode_deletes_and_resends(db_path):
+    bridge, bot = make_bridge(db_path, mode="replace")
+    meta = make_meta(3)
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    first_ids = bridge._get_tracked_messages(1, 4)
+
+    bot.calls.clear()
+    asyncio.run(bridge.refresh_channel(channel_config(), meta + make_meta(1, start=99)))
+    assert bot.calls[0] == ("delete", first_ids)
+    assert bot.calls[1][0] == "send"
+
+
+def test_swap_mode_sends_before_deleting(db_path):
+    bridge, bot = make_bridge(db_path, mode="swap")
+    meta = make_meta(3)
+    asyncio.run(bridge.refresh_channel(channel_config(), meta))
+    first_ids = bridge._get_tracked_messages(1, 4)
+
+    async def cycle():
+        await bridge.refresh_channel(channel_config(), meta + make_meta(1, start=99))
+        await bridge.close()  # waits for the background delete
+
+    bot.calls.clear()
+    asyncio.run(cycle())
+    new_ids = [msg_id for kind, msg_id in bot.calls if kind == "send"]
+    assert bot.calls[-1] == ("delete", first_ids)
+    assert bot.calls[0][0] == "send"
+    assert bridge._get_tracked_messages(1, 4) == new_ids
+
+
+def test_swap_mode_keeps_old_messages_when_a_send_fails(db_path):
+    bridge, bot = make_bridge(db_path, mode="swap")
+    asyncio.run(bridge.refresh_channel(channel_config(), make_meta(3)))
+    first_ids = bridge._get_tracked_messages(1, 4)
+
+    async def failing_send(*args):
+        return None
+
+    bot.send_chunk = failing_send
+    bot.calls.clear()
+    asyncio.run(bridge.refresh_channel(channel_config(), make_meta(4)))
+
+    assert not any(kind == "delete" for kind, _ in bot.calls)
+    assert bridge._get_tracked_messages(1, 4) == first_ids
+
+
+class SlowBot(FakeBot):
+    """Tracks how many sends are in flight at once."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_chunk(self, *args):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return await super().send_chunk(*args)
+
+
+def _insert_channels(db_path, count):
+    conn = sqlite3.connect(db_path)
+    for i in range(count):
+        conn.execute(
+            "INSERT INTO channels (name, discord_channel_id, bot_token, allowed_severities) "
+            "VALUES (?, ?, 'token', '[3,4]')",
+            (f"ch{i}", str(100 + i)),
+        )
+    conn.commit()
+    conn.close()
+
+
+def test_channels_refresh_concurrently_within_limit(db_path):
+    _insert_channels(db_path, 4)
+    bridge = DiscordBridge(db_path, max_concurrency=3)
+    bot = SlowBot()
+    bridge._get_bot = lambda token: bot
+
+    meta = make_meta(2, severity=4) + make_meta(2, severity=3, start=10)
+    asyncio.run(bridge.process_all_channels(meta))
+
+    assert len([c for c in bot.calls if c[0] == "send"]) == 8
+    assert bot.max_in_flight == 3
+
+
+def test_failing_channel_does_not_block_others(db_path):
+    _insert_channels(db_path, 2)
+    bridge, bot = make_bridge(db_path)
+    real_send = bot.send_chunk
+
+    async def send_chunk(channel_id, *args):
+        if channel_id == "100":
+            raise RuntimeError("Discord down")
+        return await real_send(channel_id, *args)
+
+    bot.send_chunk = send_chunk
+    asyncio.run(bridge.process_all_channels(make_meta(2)))
+
+    assert [c[0] for c in bot.calls] == ["send"]
+    assert bridge._get_tracked_messages(2, 4) == [bot.calls[0][1]]
+
+
+def test_unknown_mode_rejected(db_path):
+    with pytest.raises(ValueError):
+        DiscordBridge(db_path, mode="bogus")
+
+
+def test_rest_only_bridge_shares_one_rest_bot_per_token(db_path):
+    bridge = DiscordBridge(db_path, rest_only=True)
+
+    bot = bridge._get_bot("token-a")
+
+    assert isinstance(bot, DiscordRestBot)
+    assert bridge._get_bot("token-a") is bot
+    assert bridge._get_bot("token-b") is not bot
+
+
+def test_channel_with_webhook_url_uses_webhook_bot(db_path):
+    bridge = DiscordBridge(db_path)
+    url = "https://discord.com/api/webhooks/1/abc"
+
+    bot = bridge._bot_for({"bot_token": "", "webhook_url": url})
+
+    assert isinstance(bot, DiscordWebhookBot)
+    assert bridge._bot_for({"bot_token": "", "webhook_url": url}) is bot
+    assert not isinstance(bridge._bot_for({"bot_token": "token", "webhook_url": ""}), DiscordWebhookBot)
+
+
+def test_channels_reloaded_only_after_dashboard_change(db_path):
+    _insert_channels(db_path, 1)
+    bridge = DiscordBridge(db_path)
+    first = bridge.load_channels()
+
+    bridge.store.set_messages(1, 4, [10])
+    bridge.store.commit()  # the bridge's own writes don't invalidate
+    assert bridge.load_channels() is first
+
+    _insert_channels(db_path, 1)  # another connection, like the dashboard
+    assert len(bridge.load_channels()) == 2
+
+
+def test_identical_filter_rules_share_one_compiled_filter(db_path):
+    bridge = DiscordBridge(db_path)
+    other = {**channel_config(), "id": 2, "name": "Copy"}
+
+    assert bridge._filter_for(channel_config()) is bridge._filter_for(other)
+    assert bridge._filter_for(channel_config(allowed="[3]")) is not bridge._filter_for(other)
+
+
+def test_channel_with_invalid_filter_rules_is_skipped(db_path):
+    _insert_channels(db_path, 2)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE channels SET exclude_substrings = 'not json' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    bridge = DiscordBridge(db_path)
+
+    assert [c["id"] for c in bridge.load_channels()] == [2]
+
+
+def snapshot(meta):
+    """Problems in the order problem.get returns them (eventid DESC)."""
+    return sorted(meta, key=lambda item: int(item[0].eventid), reverse=True)
+
+
+def test_changes_touch_only_groups_that_gained_or_lost_problems(db_path):
+    _insert_channels(db_path, 2)
+    bridge, bot = make_bridge(db_path)
+    sev4 = make_meta(3, severity=4)
+    sev3 = make_meta(2, severity=3, start=10)
+    asyncio.run(bridge.process_all_channels(snapshot(sev4 + sev3)))
+    assert bridge.can_apply_changes()
+
+    bot.calls.clear()
+    new = make_meta(1, severity=4, start=20)
+    asyncio.run(bridge.process_changes(new, [sev3[0][0]]))
+
+    # Each channel edits its sev 4 and sev 3 message once, nothing else
+    assert sorted(kind for kind, _ in bot.calls) == ["edit"] * 4
+
+    # The delta state matches a full snapshot: a full refresh has nothing to do
+    bot.calls.clear()
+    asyncio.run(bridge.process_all_channels(snapshot(new + sev4 + sev3[1:])))
+    assert bot.calls == []
+
+
+def test_changes_without_deltas_make_no_calls(db_path):
+    _insert_channels(db_path, 1)
+    bridge, bot = make_bridge(db_path)
+    asyncio.run(bridge.process_all_channels(make_meta(3)))
+
+    bot.calls.clear()
+    asyncio.run(bridge.process_changes([], []))
+    assert bot.calls == []
+
+
+def test_config_change_requires_a_full_refresh(db_path):
+    _insert_channels(db_path, 1)
+    bridge, bot = make_bridge(db_path)
+    assert not bridge.can_apply_changes()
+
+    asyncio.run(bridge.process_all_channels(make_meta(3)))
+    assert bridge.can_apply_changes()
+
+    _insert_channels(db_path, 1)
+    assert not bridge.can_apply_changes()
+
+
+def test_changed_problem_moves_between_severity_groups(db_path):
+    _insert_channels(db_path, 1)  # severities 3 and 4
+    bridge, bot = make_bridge(db_path)
+    sev4 = make_meta(3, severity=4)
+    asyncio.run(bridge.process_all_channels(snapshot(sev4)))
+
+    problem, host, ip = sev4[0]
+    escalated = Problem(eventid=problem.eventid, name=problem.name, severity=3,
+                        acknowledged=True, clock=problem.clock, hosts=problem.hosts)
+    bot.calls.clear()
+    asyncio.run(bridge.process_changes([], [], [(escalated, host, ip)]))
+
+    # sev 4 loses it (edit), sev 3 gains its first message (send)
+    assert sorted(kind for kind, _ in bot.calls) == ["edit", "send"]
+
+    bot.calls.clear()
+    asyncio.run(bridge.process_all_channels(snapshot([(escalated, host, ip)] + sev4[1:])))
+    assert bot.calls == []
+
+
+def test_failed_delta_is_recovered_by_a_full_refresh(db_path):
+    _insert_channels(db_path, 1)
+    bridge, bot = make_bridge(db_path)
+    first, second = make_meta(1, start=1), make_meta(1, start=2)
+    meta = {item[0].eventid: item for item in first + second}
+
+    async def enrich(problems):
+        return [meta[p.eventid] for p in problems]
+
+    async def failing_enrich(problems):
+        raise TimeoutError("trigger.get timed out")
+
+    both = tuple(p for p, _, _ in snapshot(first + second))
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=(first[0][0],), full=True), enrich))
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(bridge.sync(MonitorSnapshot(problems=both, new=(second[0][0],)), failing_enrich))
+    assert not bridge.can_apply_changes()
+
+    # The next delta poll has nothing new, but the bridge refreshes in full
+    bot.calls.clear()
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=both), enrich))
+    assert bot.calls
+    assert set(bridge._routed[bridge._filter_for(bridge.load_channels()[0])][4]) == {"1", "2"}
+
+
+def test_full_poll_picks_up_ip_changes(db_path):
+    _insert_channels(db_path, 1)
+    bridge, bot = make_bridge(db_path)
+    problems = tuple(p for p, _, _ in make_meta(2))
+    ips = {"ip": "10.0.0.1"}
+
+    async def enrich(items):
+        return [(p, "Router-01", ips["ip"]) for p in items]
+
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=problems, full=True), enrich))
+    ips["ip"] = "10.0.0.2"
+
+    # A delta poll without changes leaves Discord alone; the full resync edits
+    bot.calls.clear()
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=problems), enrich))
+    assert bot.calls == []
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=problems, full=True), enrich))
+    assert [kind for kind, _ in bot.calls] == ["edit"]
+
+
+def test_failed_group_is_retried_on_a_quiet_delta_poll(db_path):
+    _insert_channels(db_path, 1)
+    bridge, bot = make_bridge(db_path)
+    first, second = make_meta(1, start=1), make_meta(1, start=2)
+    meta = {item[0].eventid: item for item in first + second}
+
+    async def enrich(problems):
+        return [meta[p.eventid] for p in problems]
+
+    async def failing_edit(channel_id, message_id, *args):
+        bot.calls.append(("edit", message_id))
+        return None
+
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=(first[0][0],), full=True), enrich))
+    both = tuple(p for p, _, _ in snapshot(first + second))
+    real_edit, bot.edit_chunk = bot.edit_chunk, failing_edit
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=both, new=(second[0][0],)), enrich))
+    assert bridge._stale == {(1, 4)}
+
+    # Nothing new, resolved or changed: the failed group is still retried
+    bot.edit_chunk = real_edit
+    bot.calls.clear()
+    asyncio.run(bridge.sync(MonitorSnapshot(problems=both), enrich))
+    assert [kind for kind, _ in bot.calls] == ["edit"]
+    assert bridge._stale == set()
+
+
+def test_switching_to_a_webhook_moves_messages_to_the_new_sender(db_path):
+    _insert_channels(db_path, 1)
+    bridge, bot = make_bridge(db_path)
+    webhook = FakeBot()
+    bridge._bot_for = lambda config: webhook if config.get("webhook_url") else bot
+    meta = make_meta(3)
+
+    asyncio.run(bridge.process_all_channels(meta))
+    old_ids = bridge._get_tracked_messages(1, 4)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE channels ADD COLUMN webhook_url TEXT")
+    conn.execute("UPDATE channels SET webhook_url = 'https://discord.com/api/webhooks/1/abc'")
+    conn.commit()
+    conn.close()
+
+    async def cycle():
+        await bridge.process_all_channels(meta)  # same problems as before
+        await bridge.close()
+
+    bot.calls.clear()
+    asyncio.run(cycle())
+    # The bot removes its own messages; the webhook posts the group afresh
+    assert bot.calls == [("delete", old_ids)]
+    assert [kind for kind, _ in webhook.calls] == ["send"]
+    assert bridge._get_tracked_messages(1, 4) == [webhook.calls[0][1]]
@@ -1,5 +1,6 @@
+import random
 import pytest
-from zabbix_minimal.discord.filters import ProblemFilter
+from zabbix_minimal.discord.filters import ProblemFilter, ProblemRouter, compile_substrings
 from zabbix_minimal.models import Problem, Host
 
 def make_problem(name, severity):
@@ -27,4 +28,62 @@ def test_allowed_severities_from_json_string():
     f = ProblemFilter({"allowed_severities": "[2,4]"})
     assert f.should_send(make_problem("Warning", severity=2)) is True
     assert f.should_send(make_problem("High", severity=4)) is True
-    assert f.should_send(make_problem("Info", severity=1)) is False
\ No newline at end of file
+    assert f.should_send(make_problem("Info", severity=1)) is False
+
+def test_compiled_substrings_match_like_plain_in():
+    rng = random.Random(7)
+    subs = ["".join(rng.choices("abc.*(", k=rng.randint(1, 4))) for _ in range(40)]
+    pattern = compile_substrings(subs)
+    for _ in range(500):
+        text = "".join(rng.choices("abc.*( ", k=rng.randint(0, 12)))
+        assert bool(pattern.search(text)) == any(sub in text for sub in subs)
+
+def test_very_long_keywords_compile():
+    long_keyword = "x" * 5000
+    assert compile_substrings([long_keyword]).search("y" + long_keyword)
+
+    # A trie nested too deep for the regex parser falls back to plain alternation
+    deep = ["a" * k + "b" for k in range(1, 800)]
+    pattern = compile_substrings(deep)
+    assert pattern.search("a" * 700 + "b")
+    assert not pattern.search("a" * 1000)
+
+def test_include_and_exclude_keyword_lists():
+    f = ProblemFilter({
+        "allowed_severities": [4],
+        "include_substrings": '["link", "device_offline"]',
+        "exclude_substrings": '["power", "link flap"]',
+    })
+    assert f.should_send(make_problem("Link down on Gi0/1", severity=4)) is True
+    assert f.should_send(make_problem("DEVICE_OFFLINE", severity=4)) is True
+    assert f.should_send(make_problem("Link flap on Gi0/1", severity=4)) is False
+    assert f.should_send(make_problem("CPU high", severity=4)) is False
+
+def test_host_ignores_match_part_of_the_hostname():
+    f = ProblemFilter({
+        "allowed_severities": [4],
+        "host_ignores": [
+            {"substring": "LowCableSpeed", "hostname": "router"},
+            {"substring": "fan", "hostname": "router"},
+            {"substring": "cpu", "hostname": "1SW"},
+        ],
+    })
+    assert f.should_send(make_problem("lowcablespeedlink1", severity=4)) is False
+    assert f.should_send(make_problem("Fan failure", severity=4)) is False
+    assert f.should_send(make_problem("CPU high", severity=4)) is True
+
+def test_router_matches_each_filter_and_shares_identical_ones():
+    network = ProblemFilter({"allowed_severities": [3, 4], "exclude_substrings": ["power"]})
+    links = ProblemFilter({"allowed_severities": [4], "include_substrings": ["link"]})
+    problems = [
+        (make_problem("Link down", severity=4), "Router-01", "10.0.0.1"),
+        (make_problem("Power supply failed", severity=4), "Router-01", "10.0.0.1"),
+        (make_problem("CPU high", severity=3), "Router-01", "10.0.0.1"),
+        (make_problem("Disk full", severity=1), "Router-01", "10.0.0.1"),
+    ]
+
+    routed = ProblemRouter([network, links, network]).route(problems)
+
+    assert len(routed) == 2
+    for f in (network, links):
+        assert routed[f] == [item for item in problems if f.should_send(item[0])]
@@ -38,3 +38,14 @@ def test_problem_host_ids():
     p = Problem(eventid="1", name="P1", severity=1,
                 acknowledged=False, clock=123, hosts=[h1, h2])
     assert p.host_ids == ["101", "102"]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("0", False), ("1", True), (0, False), (1, True), (None, False),
+])
+def test_problem_from_api_parses_acknowledged_flag(raw, expected):
+    # The API sends "0"/"1"; bool("0") would be True
+    data = {"eventid": "1", "name": "P1", "severity": "2", "clock": "1"}
+    if raw is not None:
+        data["acknowledged"] = raw
+    assert Problem.from_api(data).acknowledged is expected
@@ -0,0 +1,118 @@
+"""
+Microbenchmark: building 10k problems with Problem.from_api, against the
+original (dict-backed, keyword-argument) models, copied here verbatim for
+comparison.
+
+    python -m tests.test_models_benchmark
+    python -m pytest tests/test_models_benchmark.py -s
+"""
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from zabbix_minimal.models import Problem, NO_HOSTS
+
+COUNT = 10_000
+
+
+@dataclass
+class _LegacyHost:
+    hostid: str
+    name: str
+    status: int
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "_LegacyHost":
+        return cls(
+            hostid=str(data.get("hostid")),
+            name=data.get("name", "Unknown"),
+            status=int(data.get("status", 1)),
+        )
+
+
+@dataclass
+class _LegacyProblem:
+    eventid: str
+    name: str
+    severity: int
+    acknowledged: bool
+    clock: int
+    opdata: Optional[str] = None
+    hosts: List[_LegacyHost] = field(default_factory=list)
+    r_eventid: Optional[str] = None
+    r_clock: Optional[int] = None
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "_LegacyProblem":
+        hosts_data = data.get("hosts", [])
+        hosts = [_LegacyHost.from_api(h) for h in hosts_data]
+
+        return cls(
+            eventid=str(data.get("eventid")),
+            name=data.get("name", "Unknown"),
+            severity=int(data.get("severity", 0)),
+            acknowledged=bool(data.get("acknowledged", False)),
+            clock=int(data.get("clock", 0)),
+            opdata=data.get("opdata"),
+            hosts=hosts,
+            r_eventid=data.get("r_eventid"),
+            r_clock=int(data["r_clock"]) if data.get("r_clock") else None,
+        )
+
+
+def raw_problems(count: int = COUNT) -> List[Dict[str, Any]]:
+    """problem.get rows as returned by the API (no selectHosts, like the bridge uses)."""
+    return [
+        {
+            "eventid": str(1_000_000 + i),
+            "objectid": str(20_000 + i % 500),
+            "name": f"Interface Gi0/{i % 48}: Link down",
+            "severity": str(i % 6),
+            "acknowledged": "0",
+            "clock": "1700000000",
+            "opdata": "",
+            "r_eventid": "0",
+            "r_clock": "0",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(model, rows) -> Dict[str, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    problems = [model.from_api(r) for r in rows]
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del problems
+    return {"seconds": elapsed, "bytes": retained}
+
+
+def compare(count: int = COUNT) -> Dict[str, Dict[str, float]]:
+    rows = raw_problems(count)
+    return {"before": measure(_LegacyProblem, rows), "after": measure(Problem, rows)}
+
+
+def test_slotted_models_use_less_memory_per_10k_problems():
+    results = compare()
+    before, after = results["before"], results["after"]
+    print(
+        f"\n10k Problem.from_api: "
+        f"before {before['seconds'] * 1000:.1f} ms / {before['bytes'] / 1024:.0f} KiB, "
+        f"after {after['seconds'] * 1000:.1f} ms / {after['bytes'] / 1024:.0f} KiB"
+    )
+    # Time is machine-dependent and only reported; memory is deterministic
+    assert after["bytes"] < before["bytes"] * 0.8
+
+
+def test_problems_without_hosts_share_one_empty_sentinel():
+    a, b = (Problem.from_api(r) for r in raw_problems(2))
+    assert a.hosts is NO_HOSTS and b.hosts is NO_HOSTS
+    assert not hasattr(a, "__dict__")
+
+
+if __name__ == "__main__":
+    for label, result in compare().items():
+        print(f"{label:>6}: {result['seconds'] * 1000:7.1f} ms  {result['bytes'] / 1024:7.0f} KiB")
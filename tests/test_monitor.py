@@ -2,7 +2,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from zabbix_minimal.monitor import ZabbixMonitor
-from zabbix_minimal.models import Problem
+from zabbix_minimal.models import Problem, Host
 
 
 def test_monitor_poll_once_no_changes():
@@ -73,3 +73,149 @@ def test_monitor_start_polling():
     c, n, r = cb_calls[0]
     assert len(c) == 1
     assert len(n) == 1
+
+
+def test_monitor_incremental_poll_uses_changes():
+    mock_client = MagicMock()
+    p1 = Problem(eventid="1", name="P1", severity=1,
+                 acknowledged=False, clock=123)
+    p2 = Problem(eventid="2", name="P2", severity=1,
+                 acknowledged=False, clock=123)
+    p3 = Problem(eventid="3", name="P3", severity=1,
+                 acknowledged=False, clock=123)
+
+    # First poll is always a full snapshot
+    mock_client.get_current_problems.return_value = [p2, p1]
+    monitor = ZabbixMonitor(mock_client, incremental=True, full_resync_every=10)
+    monitor.poll_once()
+
+    # Second poll: P3 appeared, P1 resolved
+    mock_client.get_problem_changes.return_value = ([p3], {"1"}, {})
+    new, resolved, current = monitor.poll_once()
+
+    known_ids, eventid_from = mock_client.get_problem_changes.call_args.args
+    assert known_ids == {"1", "2"}
+    assert eventid_from == "3"
+    assert mock_client.get_current_problems.call_count == 1
+    assert [p.eventid for p in new] == ["3"]
+    assert [p.eventid for p in resolved] == ["1"]
+    assert [p.eventid for p in current] == ["3", "2"]
+
+
+def test_monitor_incremental_full_resync_every_n_cycles():
+    mock_client = MagicMock()
+    p1 = Problem(eventid="1", name="P1", severity=1,
+                 acknowledged=False, clock=123)
+    mock_client.get_current_problems.return_value = [p1]
+    mock_client.get_problem_changes.return_value = ([], set(), {})
+
+    monitor = ZabbixMonitor(mock_client, incremental=True, full_resync_every=3)
+    kinds = []
+    for _ in range(7):
+        monitor.poll_once()
+        kinds.append("full" if monitor.last_poll_full else "inc")
+
+    assert kinds == ["full", "inc", "inc", "full", "inc", "inc", "full"]
+    assert mock_client.get_current_problems.call_count == 3
+    assert mock_client.get_problem_changes.call_count == 4
+
+
+def test_monitor_reports_changed_problems_from_full_snapshot():
+    mock_client = MagicMock()
+    host = Host(hostid="10", name="SW1", status=0)
+    p1 = Problem(eventid="1", name="P1", severity=2,
+                 acknowledged=False, clock=123, hosts=[host])
+    p2 = Problem(eventid="2", name="P2", severity=2,
+                 acknowledged=False, clock=123)
+    monitor = ZabbixMonitor(mock_client)
+
+    mock_client.get_current_problems.return_value = [p2, p1]
+    monitor.poll_once()
+    assert monitor.last_changed == []
+
+    acked = Problem(eventid="1", name="P1", severity=4,
+                    acknowledged=True, clock=123, hosts=[host])
+    mock_client.get_current_problems.return_value = [p2, acked]
+    new, resolved, _ = monitor.poll_once()
+
+    assert new == [] and resolved == []
+    assert monitor.last_changed == [acked]
+
+
+def test_monitor_incremental_poll_reports_changed_problems():
+    mock_client = MagicMock()
+    host = Host(hostid="10", name="SW1", status=0)
+    p1 = Problem(eventid="1", name="P1", severity=2,
+                 acknowledged=False, clock=123, hosts=[host])
+    mock_client.get_current_problems.return_value = [p1]
+    monitor = ZabbixMonitor(mock_client, incremental=True)
+    monitor.poll_once()
+
+    # The cheap check carries name and severity only
+    partial = Problem(eventid="1", name="P1 renamed", severity=2, acknowledged=False, clock=0)
+    mock_client.get_problem_changes.return_value = ([], set(), {"1": partial})
+    _, _, current = monitor.poll_once()
+
+    assert [p.name for p in monitor.last_changed] == ["P1 renamed"]
+    # Fields the cheap check doesn't carry are kept from the full copy
+    assert current[0].hosts == [host] and current[0].clock == 123
+
+    mock_client.get_problem_changes.return_value = ([], set(), {"1": partial})
+    monitor.poll_once()
+    assert monitor.last_changed == []
+
+
+def test_snapshot_is_readable_while_a_poll_is_in_flight():
+    import threading
+    mock_client = MagicMock()
+    p1 = Problem(eventid="1", name="P1", severity=1,
+                 acknowledged=False, clock=123)
+    release = threading.Event()
+
+    def slow_fetch():
+        release.wait(5)
+        return [p1]
+
+    mock_client.get_current_problems.side_effect = slow_fetch
+    monitor = ZabbixMonitor(mock_client)
+    poller = threading.Thread(target=monitor.poll_once)
+    poller.start()
+
+    # The fetch is blocked, yet neither the snapshot nor the lock is held up
+    assert monitor.snapshot().problems == ()
+    assert monitor._lock.acquire(timeout=1)
+    monitor._lock.release()
+
+    release.set()
+    poller.join(5)
+    snapshot = monitor.snapshot()
+    assert snapshot.problems == (p1,) and snapshot.full
+    with pytest.raises(TypeError):
+        snapshot.by_id["2"] = p1
+
+
+def test_start_polling_keeps_a_fixed_cadence():
+    mock_client = MagicMock()
+    mock_client.get_current_problems.return_value = []
+    monitor = ZabbixMonitor(mock_client)
+    clock = [100.0]
+    waits = []
+    poll_durations = iter([2.0, 3.0, 25.0, 1.0])
+
+    def poll():
+        clock[0] += next(poll_durations)
+        return [], [], []
+
+    def wait(delay):
+        waits.append(delay)
+        clock[0] += delay
+        if len(waits) == 4:
+            monitor.stop()
+
+    monitor.poll_once = poll
+    monitor._stop.wait = wait
+    with patch("zabbix_minimal.monitor.time.monotonic", side_effect=lambda: clock[0]):
+        monitor.start_polling(interval=10, callback=None)
+
+    # Polls start at 100, 110, 120, then the 25s poll overruns 130 → next at 150
+    assert waits == [8.0, 7.0, 5.0, 9.0]
@@ -0,0 +1,109 @@
+import asyncio
+import discord
+import pytest
+
+from zabbix_minimal.discord.scheduler import RateLimitScheduler
+
+
+def test_higher_severity_runs_first():
+    order = []
+
+    async def scenario():
+        # One token per route, all three queued before the dispatcher runs
+        scheduler = RateLimitScheduler(route_limits={"send": (1, 0.05)})
+
+        def call(name):
+            async def run():
+                order.append(name)
+            return run
+
+        jobs = [
+            scheduler.submit(call("info-1"), bucket="t", kind="send", route=1, severity=1),
+            scheduler.submit(call("info-2"), bucket="t", kind="send", route=1, severity=1),
+            scheduler.submit(call("disaster"), bucket="t", kind="send", route=1, severity=5),
+        ]
+        await asyncio.gather(*jobs)
+        await scheduler.close()
+
+    asyncio.run(scenario())
+    assert order == ["disaster", "info-1", "info-2"]
+
+
+def test_blocked_route_does_not_stall_other_routes():
+    order = []
+
+    async def scenario():
+        scheduler = RateLimitScheduler(route_limits={"send": (1, 10.0)})
+
+        def call(name):
+            async def run():
+                order.append(name)
+                return name
+            return run
+
+        await scheduler.submit(call("ch1-a"), bucket="t", kind="send", route=1)
+        slow = asyncio.create_task(
+            scheduler.submit(call("ch1-b"), bucket="t", kind="send", route=1))
+        result = await asyncio.wait_for(
+            scheduler.submit(call("ch2"), bucket="t", kind="send", route=2), timeout=1)
+
+        assert result == "ch2"
+        assert scheduler.stats()["queued"] == 1
+        slow.cancel()
+        await scheduler.close()
+
+    asyncio.run(scenario())
+    assert order == ["ch1-a", "ch2"]
+
+
+def test_rate_limited_route_is_blocked_and_job_requeued():
+    order = []
+
+    async def scenario():
+        scheduler = RateLimitScheduler()
+        attempts = []
+
+        async def limited():
+            attempts.append(asyncio.get_running_loop().time())
+            if len(attempts) == 1:
+                raise discord.RateLimited(0.2)
+            order.append("ch1")
+            return "sent"
+
+        async def other():
+            order.append("ch2")
+            return "other"
+
+        first = asyncio.create_task(
+            scheduler.submit(limited, bucket="t", kind="send", route=1))
+        await asyncio.sleep(0.05)
+        # Another route keeps going while route 1 is blocked
+        assert await scheduler.submit(other, bucket="t", kind="send", route=2) == "other"
+        assert await first == "sent"
+        stats = scheduler.stats()
+        await scheduler.close()
+        return attempts, stats
+
+    attempts, stats = asyncio.run(scenario())
+    assert order == ["ch2", "ch1"]
+    assert attempts[1] - attempts[0] >= 0.19
+    assert stats["rate_limited"] == 1
+    assert stats["started"] == 3
+
+
+def test_exceptions_reach_the_submitter():
+    async def scenario():
+        scheduler = RateLimitScheduler()
+
+        async def boom():
+            raise RuntimeError("403 Forbidden")
+
+        with pytest.raises(RuntimeError):
+            await scheduler.submit(boom, bucket="t", kind="send", route=1)
+        stats = scheduler.stats()
+        await scheduler.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["started"] == 1
+    assert stats["queued"] == 0
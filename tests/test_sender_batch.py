@@ -1,5 +1,13 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+import discord
 import pytest
-from zabbix_minimal.discord.sender import _build_batch_embed, BATCH_SIZE
+from zabbix_minimal.discord.sender import (
+    _build_batch_embed, _build_message_embeds, _pack_messages,
+    BATCH_SIZE, MAX_EMBEDS_PER_MESSAGE, MAX_MESSAGE_CHARS, MAX_INLINE_RATELIMIT, DiscordBot,
+    DiscordRestBot, DiscordWebhookBot,
+)
 from zabbix_minimal.models import Problem, Host
 
 
@@ -38,4 +46,156 @@ def test_chunk_counter_in_title():
 def test_no_chunk_counter_for_single_chunk():
     problems = [meta(make_problem(1, "Disk full", 5))]
     embed = _build_batch_embed(problems, severity=5, chunk_index=0, total_chunks=1)
-    assert "1/1" not in embed.title
\ No newline at end of file
+    assert "1/1" not in embed.title
+
+
+def test_pack_200_short_problems_into_few_messages():
+    problems = [meta(make_problem(i, f"Interface {i} down", 3)) for i in range(200)]
+    messages = _pack_messages(problems)
+
+    assert len(messages) <= 2
+    assert sum(len(group) for message in messages for group in message) == 200
+    for idx, message in enumerate(messages):
+        embeds = _build_message_embeds(message, 3, idx, len(messages))
+        assert len(embeds) <= MAX_EMBEDS_PER_MESSAGE
+        assert all(len(e.fields) <= BATCH_SIZE for e in embeds)
+        assert sum(len(e) for e in embeds) <= MAX_MESSAGE_CHARS
+
+
+def test_pack_respects_character_limit_with_long_names():
+    problems = [meta(make_problem(i, "x" * 1000, 4)) for i in range(30)]
+    messages = _pack_messages(problems)
+
+    assert len(messages) > 1
+    for idx, message in enumerate(messages):
+        embeds = _build_message_embeds(message, 4, idx, len(messages))
+        assert sum(len(e) for e in embeds) <= MAX_MESSAGE_CHARS
+
+
+def test_message_embeds_title_first_footer_last():
+    problems = [meta(make_problem(i, f"P{i}", 2)) for i in range(45)]
+    (message,) = _pack_messages(problems)
+    embeds = _build_message_embeds(message, 2, 0, 1)
+
+    assert len(embeds) == 3
+    assert embeds[0].title and not embeds[1].title
+    assert embeds[-1].footer.text.endswith("45 problem(s)")
+    assert not embeds[0].footer.text
+
+
+def message_id(age: timedelta) -> int:
+    return discord.utils.time_snowflake(datetime.now(timezone.utc) - age)
+
+
+def make_bot_with_channel():
+    bot = DiscordBot("token")
+    channel = MagicMock()
+    channel.delete_messages = AsyncMock()
+    partial = MagicMock()
+    partial.delete = AsyncMock()
+    channel.get_partial_message.return_value = partial
+    bot._ensure_client = AsyncMock()
+    bot._get_channel = AsyncMock(return_value=channel)
+    return bot, channel, partial
+
+
+def test_delete_messages_bulk_deletes_recent_messages():
+    bot, channel, partial = make_bot_with_channel()
+    ids = [message_id(timedelta(hours=1)) + i for i in range(60)]
+
+    asyncio.run(bot.delete_messages(42, ids))
+
+    channel.delete_messages.assert_awaited_once()
+    assert len(channel.delete_messages.call_args.args[0]) == 60
+    channel.fetch_message.assert_not_called()
+    partial.delete.assert_not_awaited()
+
+
+def test_delete_messages_old_and_single_go_one_by_one():
+    bot, channel, partial = make_bot_with_channel()
+    old = message_id(timedelta(days=20))
+    recent = message_id(timedelta(hours=1))
+
+    asyncio.run(bot.delete_messages(42, [old, recent]))
+
+    channel.delete_messages.assert_not_awaited()
+    assert partial.delete.await_count == 2
+    channel.fetch_message.assert_not_called()
+
+
+def test_delete_messages_falls_back_when_bulk_fails():
+    bot, channel, partial = make_bot_with_channel()
+    channel.delete_messages.side_effect = Exception("400 Bad Request")
+    ids = [message_id(timedelta(hours=1)) + i for i in range(3)]
+
+    asyncio.run(bot.delete_messages(42, ids))
+
+    assert partial.delete.await_count == 3
+
+
+def test_rest_bot_logs_in_without_gateway(monkeypatch):
+    login = AsyncMock()
+    connect = AsyncMock()
+    monkeypatch.setattr(discord.Client, "login", login)
+    monkeypatch.setattr(discord.Client, "connect", connect)
+    bot = DiscordRestBot("token")
+
+    async def run():
+        await bot._ensure_client()
+        await bot._ensure_client()
+        return await bot._get_channel(42)
+
+    channel = asyncio.run(run())
+
+    login.assert_awaited_once_with("token")
+    connect.assert_not_awaited()
+    assert isinstance(channel, discord.PartialMessageable)
+    assert channel.id == 42
+    # Long 429s surface as RateLimited for the scheduler
+    assert bot._client.http.max_ratelimit_timeout == MAX_INLINE_RATELIMIT
+
+
+def test_rest_bot_bulk_deletes_through_http_client():
+    bot = DiscordRestBot("token")
+    bot._client = MagicMock()
+    bot._client.http.delete_messages = AsyncMock()
+    bot._ensure_client = AsyncMock()
+    bot._get_channel = AsyncMock(return_value=MagicMock(id=42))
+    ids = [message_id(timedelta(hours=1)) + i for i in range(5)]
+
+    asyncio.run(bot.delete_messages(42, ids))
+
+    bot._client.http.delete_messages.assert_awaited_once_with(42, ids)
+
+
+def make_webhook_bot():
+    bot = DiscordWebhookBot("https://discord.com/api/webhooks/1/abc")
+    bot._ensure_client = AsyncMock()
+    bot._webhook = MagicMock()
+    bot._webhook.send = AsyncMock(return_value=MagicMock(id=777))
+    bot._webhook.edit_message = AsyncMock()
+    bot._webhook.delete_message = AsyncMock()
+    return bot
+
+
+def test_webhook_bot_sends_with_wait_and_edits_its_message():
+    bot = make_webhook_bot()
+    chunk = [[meta(make_problem(1, "CPU high", 4))]]
+
+    msg_id = asyncio.run(bot.send_chunk(42, chunk, 4, 0, 1))
+    edited = asyncio.run(bot.edit_chunk(42, msg_id, chunk, 4, 0, 1))
+
+    assert msg_id == 777
+    assert bot._webhook.send.call_args.kwargs["wait"] is True
+    assert edited
+    bot._webhook.edit_message.assert_awaited_once()
+    assert bot._webhook.edit_message.call_args.args == (777,)
+
+
+def test_webhook_bot_deletes_one_by_one():
+    bot = make_webhook_bot()
+    ids = [message_id(timedelta(hours=1)) + i for i in range(3)]
+
+    asyncio.run(bot.delete_messages(42, ids))
+
+    assert bot._webhook.delete_message.await_count == 3
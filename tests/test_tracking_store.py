@@ -0,0 +1,108 @@
+import asyncio
+import sqlite3
+import pytest
+
+from zabbix_minimal.tracking_store import TrackingStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "dashboard.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE message_tracking ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "channel_config_id INTEGER NOT NULL, "
+        "severity INTEGER NOT NULL, "
+        "discord_message_id TEXT NOT NULL)"
+    )
+    conn.close()
+    return path
+
+
+def committed_ids(db_path, channel_config_id, severity):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT discord_message_id FROM message_tracking "
+        "WHERE channel_config_id = ? AND severity = ? ORDER BY id",
+        (channel_config_id, severity),
+    ).fetchall()
+    conn.close()
+    return [int(r[0]) for r in rows]
+
+
+def test_staged_changes_are_visible_but_written_on_commit(db_path):
+    store = TrackingStore(db_path)
+    store.set_messages(1, 4, [10, 11])
+    store.set_fingerprint(1, 4, "abc")
+
+    assert store.get_messages(1, 4) == [10, 11]
+    assert committed_ids(db_path, 1, 4) == []
+
+    store.commit()
+    assert committed_ids(db_path, 1, 4) == [10, 11]
+    assert TrackingStore(db_path).load_fingerprints() == {(1, 4): "abc"}
+
+
+def test_tracking_is_read_once_then_served_from_memory(db_path):
+    seed = TrackingStore(db_path)
+    seed.set_messages(1, 4, [10])
+    seed.close()
+
+    store = TrackingStore(db_path)
+    assert store.get_messages(1, 4) == [10]
+    store.conn.execute("DELETE FROM message_tracking")
+    assert store.get_messages(1, 4) == [10]
+
+
+def test_flush_coalesces_changes_to_one_group(db_path):
+    store = TrackingStore(db_path)
+    for ids in ([10], [10, 11], [12]):
+        store.set_messages(1, 4, ids)
+
+    asyncio.run(store.flush())
+
+    assert committed_ids(db_path, 1, 4) == [12]
+    assert not store.dirty
+
+
+def test_set_messages_replaces_the_group(db_path):
+    store = TrackingStore(db_path)
+    store.set_messages(1, 4, [10, 11])
+    store.set_messages(1, 3, [20])
+    store.commit()
+
+    store.set_messages(1, 4, [12])
+    store.set_fingerprint(1, 4, None)
+    store.commit()
+
+    assert committed_ids(db_path, 1, 4) == [12]
+    assert committed_ids(db_path, 1, 3) == [20]
+    assert store.load_fingerprints() == {}
+
+
+def test_connection_uses_wal_and_indexes_tracking(db_path):
+    store = TrackingStore(db_path)
+
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = [r["name"] for r in store.conn.execute("PRAGMA index_list(message_tracking)")]
+    assert "idx_message_tracking_channel_severity" in indexes
+    assert store.conn is store.conn
+
+
+def test_failed_commit_keeps_changes_for_next_time(db_path):
+    store = TrackingStore(db_path)
+    store.set_messages(1, 4, [10])
+    store.conn.execute("DROP TABLE message_fingerprints")
+    store.set_fingerprint(1, 4, "abc")
+
+    with pytest.raises(sqlite3.Error):
+        store.commit()
+    assert committed_ids(db_path, 1, 4) == []
+
+    store.conn.execute(
+        "CREATE TABLE message_fingerprints (channel_config_id INTEGER, severity INTEGER, "
+        "fingerprint TEXT, PRIMARY KEY (channel_config_id, severity))"
+    )
+    store.commit()
+    assert committed_ids(db_path, 1, 4) == [10]
@@ -1,5 +1,8 @@
 from .client import ZabbixClint
+from .async_client import AsyncZabbixClint
 from .cache import HostCache
+from .cache_store import CacheStore
 from .api_core import ZabbixApiCore
+from .async_core import AsyncZabbixApiCore
 
-__all__ = ["ZabbixClint", "HostCache", "ZabbixApiCore"]
+__all__ = ["ZabbixClint", "AsyncZabbixClint", "HostCache", "CacheStore", "ZabbixApiCore", "AsyncZabbixApiCore"]
@@ -1,32 +1,64 @@
 from requests import Session
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Generator, Tuple
 from .cache import HostCache
 import logging
 import time
 
 logger = logging.getLogger(__name__)
 
+# A query flow yields (method, params) requests and receives each result back.
+# Yielding a list of requests sends them as one JSON-RPC batch and receives
+# the list of results. Flows hold the request/response logic once; sync and
+# async cores drive them.
+Request = Tuple[str, Dict[str, Any]]
+Flow = Generator[Request | List[Request], Any, Any]
+
+
+def _api_url(base_url: str) -> str:
+    if "://" in base_url and not base_url.startswith(("http://", "https://")):
+        raise ValueError(f"Invalid URL scheme in {base_url}")
+    if not base_url.startswith(("http://", "https://")):
+        base_url = "http://" + base_url
+    return base_url.rstrip("/") + "/api_jsonrpc.php"
+
+
+def _host_groups(host_group_id: str | List[str] | None) -> List[str]:
+    if not host_group_id:
+        return []
+    if isinstance(host_group_id, list):
+        return [g for g in host_group_id if g]
+    return [host_group_id]
+
+
+def _batch_results(calls: List[Request], data: Any) -> List[Any]:
+    """Map a JSON-RPC batch response back onto its calls by id."""
+    if not isinstance(data, list):
+        # Zabbix answers a malformed batch with a single error object
+        raise RuntimeError(data.get("error", data) if isinstance(data, dict) else data)
+
+    by_id = {item.get("id"): item for item in data}
+    results = []
+    for i, (method, _) in enumerate(calls, start=1):
+        item = by_id.get(i)
+        if item is None:
+            raise RuntimeError(f"No response for {method} (id {i}) in batch")
+        if "error" in item:
+            logger.error(
+                f"Zabbix API returned error for {method}: {item['error']}")
+            raise RuntimeError(item["error"])
+        results.append(item["result"])
+    return results
+
 
 class ZabbixApiCore:
     def __init__(self, base_url: str, api_token: str, host_group_id: str | List[str] = None, verify_lts: bool = True):
 
-        if "://" in base_url and not base_url.startswith(("http://", "https://")):
-            raise ValueError(f"Invalid URL scheme in {base_url}")
-        if not base_url.startswith(("http://", "https://")):
-            base_url = "http://" + base_url
-
-        self.base_url = base_url.rstrip("/") + "/api_jsonrpc.php"
+        self.base_url = _api_url(base_url)
         self.token = api_token
         self.verify_lts = verify_lts
-
-        if not host_group_id:
-            self.host_group_id = []
-        elif isinstance(host_group_id, list):
-            self.host_group_id = [g for g in host_group_id if g]
-        else:
-            self.host_group_id = [host_group_id]
+        self.host_group_id = _host_groups(host_group_id)
 
         self.session = Session()
         self.session.headers.update({
@@ -45,6 +77,7 @@ class ZabbixApiCore:
         # Initialize API caches
         self.event_host_cache = HostCache(ttl_seconds=300)
         self.host_ip_cache = HostCache(ttl_seconds=300)
+        self.trigger_host_cache = HostCache(ttl_seconds=300)
 
     def test_zabbix_connection(self) -> dict:
         result = {
@@ -112,6 +145,66 @@ class ZabbixApiCore:
             logger.exception(f"API call failed for method: {method}")
             raise
 
+    def _call_many(self, calls: List[Request]) -> List[Any]:
+        """
+        Send several calls in one JSON-RPC batch round trip.
+        Returns the results in the same order as calls.
+        """
+        if not calls:
+            return []
+
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params or {},
+                "auth": self.token,
+                "id": i,
+            }
+            for i, (method, params) in enumerate(calls, start=1)
+        ]
+        methods = ", ".join(method for method, _ in calls)
+
+        try:
+            start = time.time()
+
+            logger.debug(f"Calling Zabbix API batch: {methods}")
+
+            response = self.session.post(
+                self.base_url,
+                json=payload,
+                verify=self.verify_lts,
+                timeout=40,
+            )
+
+            response.raise_for_status()
+            data = response.json()
+
+            duration = time.time() - start
+
+            results = _batch_results(calls, data)
+
+            logger.info(f"Batch [{methods}] succeeded in {duration:.2f}s")
+
+            return results
+
+        except Exception:
+            logger.exception(f"API batch call failed for methods: {methods}")
+            raise
+
+    def _run(self, flow: Flow) -> Any:
+        """Drive a query flow to completion with blocking calls."""
+        try:
+            request = next(flow)
+            while True:
+                if isinstance(request, list):
+                    result = self._call_many(request)
+                else:
+                    result = self._call(*request)
+                request = flow.send(result)
+        except StopIteration as done:
+            return done.value
+
     def is_connected(self) -> bool:
         try:
             logger.debug("Checking Zabbix API health")
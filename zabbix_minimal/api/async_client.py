@@ -0,0 +1,29 @@
+from typing import List, Dict, Set, Tuple
+from zabbix_minimal.models import Problem, Host
+from .async_core import AsyncZabbixApiCore
+from .client import ZabbixQueries, ENRICH_TRIGGER
+
+
+class AsyncZabbixClint(ZabbixQueries, AsyncZabbixApiCore):
+    """Same surface as ZabbixClint, but every call is awaitable."""
+
+    async def get_current_problems(self) -> List[Problem]:
+        return await self._run(self._current_problems_flow())
+
+    async def get_problem_changes(
+        self, known_ids: Set[str], eventid_from: str,
+    ) -> Tuple[List[Problem], Set[str], Dict[str, Problem]]:
+        return await self._run(self._problem_changes_flow(known_ids, eventid_from))
+
+    async def get_event_hosts(self, event_ids: List[str]) -> Dict[str, List[Host]]:
+        return await self._run(self._event_hosts_flow(event_ids))
+
+    async def get_host_ips(self, host_ids: List[str]) -> Dict[str, str]:
+        return await self._run(self._host_ips_flow(host_ids))
+
+    async def get_hosts_and_ips(self, event_ids: List[str]) -> Tuple[Dict[str, List[Host]], Dict[str, str]]:
+        return await self._run(self._hosts_and_ips_flow(event_ids))
+
+    async def get_problems_meta(self, problems: List[Problem], strategy: str = ENRICH_TRIGGER) -> List[Tuple[Problem, str, str]]:
+        """Attach hosts to problems. Returns (problem, host_name, ip) tuples."""
+        return await self._run(self._problems_meta_flow(problems, strategy))
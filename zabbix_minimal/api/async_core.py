@@ -0,0 +1,197 @@
+import asyncio
+import aiohttp
+from typing import Dict, Any, List
+from .api_core import Flow, Request, _api_url, _batch_results, _host_groups
+from .cache import HostCache
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncZabbixApiCore:
+    """
+    asyncio counterpart of ZabbixApiCore.
+
+    Uses one pooled aiohttp session so Zabbix I/O never blocks the event loop
+    (and the Discord gateway heartbeats running on it).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_token: str,
+        host_group_id: str | List[str] = None,
+        verify_lts: bool = True,
+        max_connections: int = 10,
+        timeout: float = 40,
+        retries: int = 5,
+        backoff_factor: float = 1,
+    ):
+        self.base_url = _api_url(base_url)
+        self.token = api_token
+        self.verify_lts = verify_lts
+        self.host_group_id = _host_groups(host_group_id)
+
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._session: aiohttp.ClientSession | None = None
+
+        # Initialize API caches
+        self.event_host_cache = HostCache(ttl_seconds=300)
+        self.host_ip_cache = HostCache(ttl_seconds=300)
+        self.trigger_host_cache = HostCache(ttl_seconds=300)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily: aiohttp sessions must be bound to a running loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Content-Type": "application/json"},
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    ssl=None if self.verify_lts else False,
+                ),
+            )
+        return self._session
+
+    async def _post(self, payload: Any, timeout: float) -> Any:
+        """POST a JSON-RPC payload, retrying transient failures with backoff."""
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                async with session.post(self.base_url, json=payload, timeout=client_timeout) as response:
+                    if response.status in RETRY_STATUSES and not last_attempt:
+                        logger.warning(f"Zabbix API returned HTTP {response.status}, retrying")
+                    else:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+                logger.warning("Zabbix API connection failed, retrying")
+
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def _call(self, method: str, params: Dict[str, Any] | None = None) -> Any:
+        payload = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or {},
+            "auth": self.token,
+            "id": 1,
+        }
+
+        try:
+            start = time.time()
+
+            logger.debug(f"Calling Zabbix API method: {method}")
+
+            data = await self._post(payload, self.timeout)
+
+            duration = time.time() - start
+
+            if "error" in data:
+                logger.error(
+                    f"Zabbix API returned error for {method}: {data['error']}")
+                raise RuntimeError(data["error"])
+
+            logger.info(f"{method} succeeded in {duration:.2f}s")
+
+            return data["result"]
+
+        except Exception:
+            logger.exception(f"API call failed for method: {method}")
+            raise
+
+    async def _call_many(self, calls: List[Request]) -> List[Any]:
+        """
+        Send several calls in one JSON-RPC batch round trip.
+        Returns the results in the same order as calls.
+        """
+        if not calls:
+            return []
+
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params or {},
+                "auth": self.token,
+                "id": i,
+            }
+            for i, (method, params) in enumerate(calls, start=1)
+        ]
+        methods = ", ".join(method for method, _ in calls)
+
+        try:
+            start = time.time()
+
+            logger.debug(f"Calling Zabbix API batch: {methods}")
+
+            data = await self._post(payload, self.timeout)
+
+            duration = time.time() - start
+
+            results = _batch_results(calls, data)
+
+            logger.info(f"Batch [{methods}] succeeded in {duration:.2f}s")
+
+            return results
+
+        except Exception:
+            logger.exception(f"API batch call failed for methods: {methods}")
+            raise
+
+    async def _run(self, flow: Flow) -> Any:
+        """Drive a query flow to completion without blocking the event loop."""
+        try:
+            request = next(flow)
+            while True:
+                if isinstance(request, list):
+                    result = await self._call_many(request)
+                else:
+                    result = await self._call(*request)
+                request = flow.send(result)
+        except StopIteration as done:
+            return done.value
+
+    async def is_connected(self) -> bool:
+        try:
+            logger.debug("Checking Zabbix API health")
+
+            payload = {
+                "jsonrpc": "2.0",
+                "method": "apiinfo.version",
+                "params": [],
+                "id": 1
+            }
+
+            session = self._get_session()
+            async with session.post(
+                self.base_url,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=5),
+            ) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+
+            logger.info("Zabbix connection successful")
+            return "result" in data
+
+        except Exception:
+            logger.warning("Zabbix connection failed")
+            return False
+
+    async def get_current_problems(self) -> List[Any]:
+        return []
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
@@ -1,29 +1,155 @@
+import random
 import time
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, NamedTuple, Tuple
+
+
+_NEGATIVE = object()  # stored for keys the API returned nothing for
+
+
+class _Entry(NamedTuple):
+    value: Any
+    refresh_at: float  # reported by get_missing from here on, still served
+    expires_at: float  # dropped from here on
 
 
 class HostCache:
-    def __init__(self, ttl_seconds: int = 300):
-        self.cache = {}
-        self.last_refresh = time.time()
+    """
+    Per-key TTL cache with jittered refresh-ahead and an LRU size bound.
+
+    Every entry expires ttl_seconds after it was stored. Somewhere in the last
+    refresh_ahead fraction of that window (picked at random per entry) the key
+    starts showing up in get_missing while get_many keeps serving it, so
+    refetches are spread over several cycles instead of one spike.
+
+    Keys the API returned nothing for can be stored as negative entries for
+    negative_ttl_seconds: they are neither missing nor served by get_many.
+
+    Hits and misses are counted by get_missing: a miss is a key that has to
+    be fetched (absent, expired or due for a refresh-ahead).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_size: int = 50_000,
+        refresh_ahead: float = 0.2,
+        negative_ttl_seconds: int = 60,
+    ):
+        self.cache: "OrderedDict[str, _Entry]" = OrderedDict()
         self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.refresh_ahead = refresh_ahead
+        self.negative_ttl_seconds = negative_ttl_seconds
 
-    def is_expired(self) -> bool:
-        return time.time() - self.last_refresh > self.ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Keys changed since the last export_dirty(), for write-through
+        # persistence. Always a subset of the cached keys, so bounded by max_size
+        self._dirty: set = set()
+
+    def _live(self, key: str, now: float) -> _Entry | None:
+        entry = self.cache.get(key)
+        if entry is not None and entry.expires_at <= now:
+            del self.cache[key]
+            self._dirty.discard(key)
+            return None
+        return entry
 
     def refresh(self):
+        """Drop every entry."""
         self.cache.clear()
-        self.last_refresh = time.time()
+        self._dirty.clear()
 
     def get_missing(self, keys: List[str]) -> List[str]:
-        if self.is_expired():
-            self.refresh()
-        return [k for k in keys if k not in self.cache]
+        """Keys that are absent, expired or due for a refresh-ahead."""
+        now = time.monotonic()
+        missing = []
+        for k in keys:
+            entry = self._live(k, now)
+            if entry is None or entry.refresh_at <= now:
+                self.misses += 1
+                missing.append(k)
+            else:
+                self.hits += 1
+        return missing
 
     def update(self, new_data: Dict[str, Any]):
-        self.cache.update(new_data)
+        now = time.monotonic()
+        for k, v in new_data.items():
+            jitter = self.ttl_seconds * self.refresh_ahead * random.random()
+            self.cache[k] = _Entry(v, now + self.ttl_seconds - jitter, now + self.ttl_seconds)
+            self.cache.move_to_end(k)
+        self._dirty.update(new_data)
+        self._evict()
+
+    def update_negative(self, keys: List[str]):
+        """Remember that these keys do not exist, so they stop being refetched."""
+        expires_at = time.monotonic() + self.negative_ttl_seconds
+        for k in keys:
+            self.cache[k] = _Entry(_NEGATIVE, expires_at, expires_at)
+            self.cache.move_to_end(k)
+        self._dirty.update(keys)
+        self._evict()
+
+    def _evict(self):
+        while len(self.cache) > self.max_size:
+            key, _ = self.cache.popitem(last=False)
+            self._dirty.discard(key)
+            self.evictions += 1
 
     def get_many(self, keys: List[str]) -> Dict[str, Any]:
-        if self.is_expired():
-            self.refresh()
-        return {k: self.cache[k] for k in keys if k in self.cache}
+        """Cached values for the given keys (negative entries excluded)."""
+        now = time.monotonic()
+        result = {}
+        for k in keys:
+            entry = self._live(k, now)
+            if entry is not None:
+                self.cache.move_to_end(k)
+                if entry.value is not _NEGATIVE:
+                    result[k] = entry.value
+        return result
+
+    def export_dirty(self) -> List[Tuple[str, Any, bool, float, float]]:
+        """
+        Entries changed since the last call, as
+        (key, value, is_negative, refresh_at, expires_at) with wall-clock times.
+        """
+        offset = time.time() - time.monotonic()
+        rows = []
+        for k in self._dirty:
+            entry = self.cache.get(k)
+            if entry is not None:
+                negative = entry.value is _NEGATIVE
+                rows.append((
+                    k,
+                    None if negative else entry.value,
+                    negative,
+                    entry.refresh_at + offset,
+                    entry.expires_at + offset,
+                ))
+        self._dirty.clear()
+        return rows
+
+    def import_entries(self, rows: List[Tuple[str, Any, bool, float, float]]):
+        """Load rows produced by export_dirty(), skipping ones that have expired."""
+        offset = time.monotonic() - time.time()
+        now = time.monotonic()
+        for k, value, negative, refresh_at, expires_at in rows:
+            expires_at += offset
+            if expires_at <= now:
+                continue
+            self.cache[k] = _Entry(_NEGATIVE if negative else value, refresh_at + offset, expires_at)
+            self.cache.move_to_end(k)
+        self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "negatives": sum(1 for e in self.cache.values() if e.value is _NEGATIVE),
+        }
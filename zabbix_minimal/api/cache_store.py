@@ -0,0 +1,71 @@
+import json
+import sqlite3
+import logging
+import time
+from typing import Any, Callable
+
+from .cache import HostCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStore:
+    """
+    SQLite file that keeps HostCache entries (with their expiry) across
+    restarts, so the first poll after a deploy is served from cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = self._get_db()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS metadata_cache ("
+            "cache TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "value TEXT, "
+            "negative INTEGER NOT NULL DEFAULT 0, "
+            "refresh_at REAL NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "PRIMARY KEY (cache, key))"
+        )
+        conn.commit()
+        conn.close()
+
+    def _get_db(self):
+        return sqlite3.connect(self.path)
+
+    def save(self, name: str, cache: HostCache, encode: Callable[[Any], Any] = lambda v: v):
+        """Write entries changed since the last save and prune expired ones."""
+        rows = [
+            (name, k, None if negative else json.dumps(encode(v)), int(negative), refresh_at, expires_at)
+            for k, v, negative, refresh_at, expires_at in cache.export_dirty()
+        ]
+        conn = self._get_db()
+        conn.executemany(
+            "INSERT OR REPLACE INTO metadata_cache "
+            "(cache, key, value, negative, refresh_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute(
+            "DELETE FROM metadata_cache WHERE cache = ? AND expires_at <= ?",
+            (name, time.time()),
+        )
+        conn.commit()
+        conn.close()
+        if rows:
+            logger.debug(f"Persisted {len(rows)} {name} cache entries")
+
+    def load(self, name: str, cache: HostCache, decode: Callable[[Any], Any] = lambda v: v):
+        conn = self._get_db()
+        rows = conn.execute(
+            "SELECT key, value, negative, refresh_at, expires_at FROM metadata_cache "
+            "WHERE cache = ? AND expires_at > ?",
+            (name, time.time()),
+        ).fetchall()
+        conn.close()
+
+        cache.import_entries([
+            (k, None if negative else decode(json.loads(value)), bool(negative), refresh_at, expires_at)
+            for k, value, negative, refresh_at, expires_at in rows
+        ])
+        logger.info(f"Loaded {len(rows)} {name} cache entries from {self.path}")
@@ -1,79 +1,366 @@
-from typing import List, Dict, Any
+from dataclasses import replace
+from typing import List, Dict, Set, Tuple
 from zabbix_minimal.models import Problem, Host, Interface
-from .api_core import ZabbixApiCore
+from .api_core import ZabbixApiCore, Flow
+from .cache_store import CacheStore
 
+# Enrichment strategies for get_problems_meta
+ENRICH_TRIGGER = "trigger"  # trigger.get + host.get by triggerids, one batched round trip
+ENRICH_EVENT = "event"      # event.get → host.get, up to two round trips
 
-class ZabbixClint(ZabbixApiCore):
 
-    def get_current_problems(self) -> List[Problem]:
-        raw_problems = self._call("problem.get", {
-            "output": "extend",
+def _encode_hosts(hosts: List[Host]) -> List[Dict]:
+    return [{"hostid": h.hostid, "name": h.name, "status": h.status} for h in hosts]
+
+
+def _decode_hosts(data: List[Dict]) -> List[Host]:
+    return [Host.from_api(h) for h in data]
+
+
+def _problems_with_meta(problems: List[Problem], ip_map: Dict[str, str]) -> List[Tuple[Problem, str, str]]:
+    """Pair each problem with its primary host name and IP."""
+    result = []
+    for problem in problems:
+        host = problem.primary_host
+        host_name = host.name if host else "Unknown"
+        ip = ip_map.get(host.hostid, "N/A") if host else "N/A"
+        result.append((problem, host_name, ip))
+    return result
+
+
+class ZabbixQueries:
+    """
+    Zabbix query logic shared by the blocking and asyncio clients.
+
+    Each *_flow method is a generator that yields (method, params) API
+    requests and receives the results, so the same code runs on top of
+    either transport.
+    """
+
+    def _problem_get_params(self, **extra) -> Dict:
+        return {
             "suppressed": False,
             "recent": False,
-            "sortfield": ["eventid"],
-            "sortorder": "DESC",
             **({"groupids": self.host_group_id} if self.host_group_id else {}),
-        })
+            **extra,
+        }
+
+    def _current_problems_flow(self) -> Flow:
+        raw_problems = yield ("problem.get", self._problem_get_params(
+            output="extend",
+            sortfield=["eventid"],
+            sortorder="DESC",
+        ))
         return [Problem.from_api(p) for p in raw_problems]
 
-    def get_event_hosts(self, event_ids: List[str]) -> Dict[str, List[Host]]:
+    def _problem_changes_flow(self, known_ids: Set[str], eventid_from: str) -> Flow:
+        """
+        Incremental alternative to a full problem.get snapshot.
+
+        One batch fetches eventid, name and severity of every active
+        problem (the cheap resolved and changed check) and the full objects of
+        problems with eventid >= eventid_from. Active IDs that are unknown yet
+        older than eventid_from (e.g. a problem that just became unsuppressed)
+        are fetched in a follow-up call.
+
+        Returns (new_problems, resolved_ids, known_states), where known_states
+        maps each still-active known eventid to a partial Problem carrying
+        only those fields (see Problem.quick_state). Acknowledged and opdata
+        aren't rendered and are left out; the periodic full snapshot catches those.
+        """
+        raw_ids, raw_fresh = yield [
+            ("problem.get", self._problem_get_params(
+                output=["eventid", "name", "severity"])),
+            ("problem.get", self._problem_get_params(
+                output="extend",
+                eventid_from=eventid_from,
+                sortfield=["eventid"],
+                sortorder="DESC",
+            )),
+        ]
+
+        active_ids = {str(p["eventid"]) for p in raw_ids}
+        new_problems = [
+            problem for problem in map(Problem.from_api, raw_fresh)
+            if problem.eventid not in known_ids
+        ]
+        fetched_ids = {p.eventid for p in new_problems}
+        active_ids |= fetched_ids
+
+        stragglers = active_ids - known_ids - fetched_ids
+        if stragglers:
+            raw_problems = yield ("problem.get", self._problem_get_params(
+                output="extend",
+                eventids=sorted(stragglers),
+            ))
+            new_problems.extend(Problem.from_api(p) for p in raw_problems)
+
+        known_states = {
+            str(p["eventid"]): Problem.from_api(p)
+            for p in raw_ids if str(p["eventid"]) in known_ids
+        }
+        return new_problems, known_ids - active_ids, known_states
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss/eviction/negative counters of the metadata caches."""
+        return {
+            "event_host": self.event_host_cache.stats(),
+            "host_ip": self.host_ip_cache.stats(),
+            "trigger_host": self.trigger_host_cache.stats(),
+        }
+
+    def _persisted_caches(self):
+        return [
+            ("event_host", self.event_host_cache, _encode_hosts, _decode_hosts),
+            ("host_ip", self.host_ip_cache, str, str),
+            ("trigger_host", self.trigger_host_cache, _encode_hosts, _decode_hosts),
+        ]
+
+    def load_caches(self, store: CacheStore):
+        """Warm the metadata caches from disk (e.g. after a restart)."""
+        for name, cache, _, decode in self._persisted_caches():
+            store.load(name, cache, decode)
+
+    def save_caches(self, store: CacheStore):
+        """Persist cache entries changed since the last save."""
+        for name, cache, encode, _ in self._persisted_caches():
+            store.save(name, cache, encode)
+
+    # ── Request builders / response parsers ────────────────────────────────────
+
+    @staticmethod
+    def _event_get_params(event_ids: List[str]) -> Dict:
+        return {
+            "eventids": event_ids,
+            "output": ["eventid"],
+            "selectHosts": ["hostid", "name", "status"]
+        }
+
+    @staticmethod
+    def _host_get_params(host_ids: List[str]) -> Dict:
+        return {
+            "hostids": host_ids,
+            "output": ["hostid"],
+            "selectInterfaces": ["ip", "main"]
+        }
+
+    def _store_event_hosts(self, raw_events: List[Dict], requested_ids: List[str]) -> Dict[str, List[Host]]:
+        new_event_host_map = {}
+        for event in raw_events:
+            event_id = str(event["eventid"])
+            hosts = [Host.from_api(h) for h in event.get("hosts", [])]
+            new_event_host_map[event_id] = hosts
+
+        self.event_host_cache.update(new_event_host_map)
+        # Purged events / no permission: stop asking every cycle
+        self.event_host_cache.update_negative(
+            [e for e in requested_ids if e not in new_event_host_map])
+        return new_event_host_map
+
+    def _store_host_ips(self, raw_hosts: List[Dict], requested_ids: List[str] | None = None) -> Dict[str, str]:
+        new_ip_map = {}
+
+        for host_data in raw_hosts:
+            host_id = str(host_data["hostid"])
+            interfaces_data = host_data.get("interfaces", [])
+
+            # Convert raw interface data to Interface models
+            interfaces = [Interface.from_api(iface)
+                          for iface in interfaces_data]
+
+            ip = "N/A"
+
+            for interface in interfaces:
+                if interface.main:
+                    ip = interface.ip
+                    break
+
+            if ip == "N/A" and interfaces:
+                ip = interfaces[0].ip
+
+            new_ip_map[host_id] = ip
+
+        self.host_ip_cache.update(new_ip_map)
+        if requested_ids:
+            # Deleted hosts / no permission: stop asking every cycle
+            self.host_ip_cache.update_negative(
+                [h for h in requested_ids if h not in new_ip_map])
+        return new_ip_map
+
+    # ── Flows ──────────────────────────────────────────────────────────────────
+
+    def _event_hosts_flow(self, event_ids: List[str]) -> Flow:
         if not event_ids:
             return {}
 
         missing_event_ids = self.event_host_cache.get_missing(event_ids)
 
         if missing_event_ids:
-            raw_hosts = self._call("event.get", {
-                "eventids": missing_event_ids,
-                "output": ["eventid"],
-                "selectHosts": ["hostid", "name", "status"]
-            })
-
-            new_event_host_map = {}
-            for event in raw_hosts:
-                event_id = str(event["eventid"])
-                hosts = [Host.from_api(h) for h in event.get("hosts", [])]
-                new_event_host_map[event_id] = hosts
-
-            self.event_host_cache.update(new_event_host_map)
+            raw_events = yield ("event.get", self._event_get_params(missing_event_ids))
+            self._store_event_hosts(raw_events, missing_event_ids)
 
         return self.event_host_cache.get_many(event_ids)
 
-    def get_host_ips(self, host_ids: List[str]) -> Dict[str, str]:
+    def _host_ips_flow(self, host_ids: List[str]) -> Flow:
         if not host_ids:
             return {}
 
         missing_host_ids = self.host_ip_cache.get_missing(host_ids)
 
         if missing_host_ids:
-            raw_hosts = self._call("host.get", {
-                "hostids": missing_host_ids,
+            raw_hosts = yield ("host.get", self._host_get_params(missing_host_ids))
+            self._store_host_ips(raw_hosts, missing_host_ids)
+
+        return self.host_ip_cache.get_many(host_ids)
+
+    def _hosts_and_ips_flow(self, event_ids: List[str]) -> Flow:
+        """
+        Resolve events → hosts → IPs with as few round trips as possible.
+
+        Missing events and missing IPs of hosts already known from cached
+        events go out together in one JSON-RPC batch; only hosts first seen
+        in that batch need a second host.get.
+        """
+        if not event_ids:
+            return {}, {}
+
+        missing_event_ids = self.event_host_cache.get_missing(event_ids)
+        known_host_ids = list({
+            h.hostid
+            for hosts in self.event_host_cache.get_many(event_ids).values()
+            for h in hosts
+        })
+        missing_host_ids = self.host_ip_cache.get_missing(known_host_ids)
+
+        calls = []
+        if missing_event_ids:
+            calls.append(("event.get", self._event_get_params(missing_event_ids)))
+        if missing_host_ids:
+            calls.append(("host.get", self._host_get_params(missing_host_ids)))
+
+        if calls:
+            results = yield calls
+            if missing_event_ids:
+                self._store_event_hosts(results.pop(0), missing_event_ids)
+            if missing_host_ids:
+                self._store_host_ips(results.pop(0), missing_host_ids)
+
+        event_host_map = self.event_host_cache.get_many(event_ids)
+        all_host_ids = list({
+            h.hostid
+            for hosts in event_host_map.values()
+            for h in hosts
+        })
+
+        # Hosts checked above were fetched or are fresh; only check the rest
+        checked = set(known_host_ids)
+        new_host_ids = self.host_ip_cache.get_missing(
+            [h for h in all_host_ids if h not in checked])
+        if new_host_ids:
+            raw_hosts = yield ("host.get", self._host_get_params(new_host_ids))
+            self._store_host_ips(raw_hosts, new_host_ids)
+
+        return event_host_map, self.host_ip_cache.get_many(all_host_ids)
+
+    def _event_meta_flow(self, problems: List[Problem]) -> Flow:
+        event_host_map, ip_map = yield from self._hosts_and_ips_flow(
+            [p.eventid for p in problems])
+
+        # Copies, not in-place: the monitor's published snapshot holds these problems
+        problems = [
+            replace(p, hosts=event_host_map[p.eventid]) if p.eventid in event_host_map else p
+            for p in problems
+        ]
+
+        return _problems_with_meta(problems, ip_map)
+
+    def _trigger_meta_flow(self, problems: List[Problem]) -> Flow:
+        """
+        Resolve problems to hosts and IPs through their trigger objectids.
+
+        trigger.get (selectHosts) and host.get filtered by the same triggerids
+        (selectInterfaces) go out in one JSON-RPC batch, so uncached triggers
+        cost a single round trip. Trigger → hosts is cached by objectid.
+        """
+        object_ids = list({p.objectid for p in problems if p.objectid})
+
+        missing_trigger_ids = self.trigger_host_cache.get_missing(object_ids)
+        known_host_ids = list({
+            h.hostid
+            for hosts in self.trigger_host_cache.get_many(object_ids).values()
+            for h in hosts
+        })
+        missing_host_ids = self.host_ip_cache.get_missing(known_host_ids)
+
+        calls = []
+        if missing_trigger_ids:
+            calls.append(("trigger.get", {
+                "triggerids": missing_trigger_ids,
+                "output": ["triggerid"],
+                "selectHosts": ["hostid", "name", "status"],
+            }))
+            calls.append(("host.get", {
+                "triggerids": missing_trigger_ids,
                 "output": ["hostid"],
-                "selectInterfaces": ["ip", "main"]
-            })
+                "selectInterfaces": ["ip", "main"],
+            }))
+        if missing_host_ids:
+            calls.append(("host.get", self._host_get_params(missing_host_ids)))
 
-            new_ip_map = {}
+        if calls:
+            results = yield calls
+            if missing_trigger_ids:
+                trigger_hosts = {
+                    str(t["triggerid"]): [Host.from_api(h) for h in t.get("hosts", [])]
+                    for t in results.pop(0)
+                }
+                self.trigger_host_cache.update(trigger_hosts)
+                self.trigger_host_cache.update_negative(
+                    [t for t in missing_trigger_ids if t not in trigger_hosts])
+                self._store_host_ips(results.pop(0))
+            if missing_host_ids:
+                self._store_host_ips(results.pop(0), missing_host_ids)
 
-            for host_data in raw_hosts:
-                host_id = str(host_data["hostid"])
-                interfaces_data = host_data.get("interfaces", [])
+        trigger_host_map = self.trigger_host_cache.get_many(object_ids)
+        problems = [
+            replace(p, hosts=trigger_host_map[p.objectid]) if p.objectid in trigger_host_map else p
+            for p in problems
+        ]
 
-                # Convert raw interface data to Interface models
-                interfaces = [Interface.from_api(iface)
-                              for iface in interfaces_data]
+        all_host_ids = list({
+            h.hostid
+            for hosts in trigger_host_map.values()
+            for h in hosts
+        })
+        return _problems_with_meta(problems, self.host_ip_cache.get_many(all_host_ids))
 
-                ip = "N/A"
+    def _problems_meta_flow(self, problems: List[Problem], strategy: str) -> Flow:
+        if strategy == ENRICH_TRIGGER:
+            return (yield from self._trigger_meta_flow(problems))
+        if strategy == ENRICH_EVENT:
+            return (yield from self._event_meta_flow(problems))
+        raise ValueError(f"Unknown enrichment strategy: {strategy}")
 
-                for interface in interfaces:
-                    if interface.main:
-                        ip = interface.ip
-                        break
 
-                if ip == "N/A" and interfaces:
-                    ip = interfaces[0].ip
+class ZabbixClint(ZabbixQueries, ZabbixApiCore):
 
-                new_ip_map[host_id] = ip
+    def get_current_problems(self) -> List[Problem]:
+        return self._run(self._current_problems_flow())
 
-            self.host_ip_cache.update(new_ip_map)
+    def get_problem_changes(
+        self, known_ids: Set[str], eventid_from: str,
+    ) -> Tuple[List[Problem], Set[str], Dict[str, Problem]]:
+        return self._run(self._problem_changes_flow(known_ids, eventid_from))
 
-        return self.host_ip_cache.get_many(host_ids)
+    def get_event_hosts(self, event_ids: List[str]) -> Dict[str, List[Host]]:
+        return self._run(self._event_hosts_flow(event_ids))
+
+    def get_host_ips(self, host_ids: List[str]) -> Dict[str, str]:
+        return self._run(self._host_ips_flow(host_ids))
+
+    def get_hosts_and_ips(self, event_ids: List[str]) -> Tuple[Dict[str, List[Host]], Dict[str, str]]:
+        return self._run(self._hosts_and_ips_flow(event_ids))
+
+    def get_problems_meta(self, problems: List[Problem], strategy: str = ENRICH_TRIGGER) -> List[Tuple[Problem, str, str]]:
+        """Attach hosts to problems. Returns (problem, host_name, ip) tuples."""
+        return self._run(self._problems_meta_flow(problems, strategy))
@@ -1,3 +1,3 @@
-from .filters import ProblemFilter
+from .filters import ProblemFilter, ProblemRouter
 
-__all__ = ["ProblemFilter"]
+__all__ = ["ProblemFilter", "ProblemRouter"]
@@ -1,11 +1,53 @@
 import json
 import logging
-from typing import List, Set
+import re
+from typing import Dict, Iterable, List, Pattern, Set, Tuple
 from ..models import Problem
 
 logger = logging.getLogger(__name__)
 
 
+def compile_substrings(substrings: List[str]) -> Pattern | None:
+    """
+    One regex that matches wherever any of the substrings occurs.
+
+    The alternatives are laid out as a trie (shared prefixes factored out),
+    so the regex engine follows a single branch per character instead of
+    trying every pattern at every position. Returns None for no substrings.
+    """
+    trie: dict = {}
+    for sub in substrings:
+        node = trie
+        for ch in sub:
+            node = node.setdefault(ch, {})
+        node[""] = True  # a pattern ends here
+
+    if not trie:
+        return None
+
+    # Built bottom-up with an explicit stack: the trie is one level deep per
+    # character, so a recursive walk fails on long keywords
+    built: Dict[int, str] = {}  # id(node) → pattern
+    stack = [(trie, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if "" in node:
+            # A shorter pattern already matched; longer ones add nothing
+            built[id(node)] = ""
+        elif not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.values())
+        else:
+            branches = [re.escape(ch) + built[id(child)] for ch, child in sorted(node.items())]
+            built[id(node)] = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    try:
+        return re.compile(built[id(trie)])
+    except (re.error, RecursionError):
+        # Too deeply nested for the regex parser: plain alternation instead
+        return re.compile("|".join(re.escape(sub) for sub in sorted(set(substrings))))
+
+
 class ProblemFilter:
     """
     Decides whether a problem should be forwarded to Discord.
@@ -51,31 +93,98 @@ class ProblemFilter:
             raw_ignores = json.loads(raw_ignores) if raw_ignores else []
         self.host_ignores = raw_ignores
 
+        # Compile step: one matcher each for include and exclude, and one per
+        # ignored hostname covering all of that host's substrings
+        self._include = compile_substrings(self.include_substrings)
+        self._exclude = compile_substrings(self.exclude_substrings)
+        by_host: Dict[str, List[str]] = {}
+        for rule in self.host_ignores:
+            sub = rule.get("substring", "").lower()
+            host = rule.get("hostname", "").lower()
+            if sub and host:
+                by_host.setdefault(host, []).append(sub)
+        self._host_ignores: Dict[str, Pattern] = {
+            host: compile_substrings(subs) for host, subs in by_host.items()
+        }
+
     def should_send(self, problem: Problem) -> bool:
         """Returns True if the problem should be sent to Discord."""
-        name_lower = problem.name.lower()
+        host_names = [h.name.lower() for h in problem.hosts] if problem.hosts else []
+        return self._matches(problem.severity, problem.name.lower(), host_names)
+
+    @property
+    def keywords(self) -> Set[str]:
+        """Every substring any rule of this filter looks for."""
+        words = set(self.include_substrings) | set(self.exclude_substrings)
+        for rule in self.host_ignores:
+            sub = rule.get("substring", "").lower()
+            if sub and rule.get("hostname", ""):
+                words.add(sub)
+        return words
 
+    def _matches(self, severity: int, name_lower: str, host_names: List[str]) -> bool:
         # Rule 1: Severity must be in the chosen set
-        if problem.severity not in self.allowed_severities:
+        if severity not in self.allowed_severities:
             return False
 
         # Rule 2: Must match at least one include substring (if configured)
-        if self.include_substrings:
-            if not any(sub in name_lower for sub in self.include_substrings):
-                return False
+        if self._include and not self._include.search(name_lower):
+            return False
 
         # Rule 3: Must NOT match any exclude substring
-        if any(sub in name_lower for sub in self.exclude_substrings):
+        if self._exclude and self._exclude.search(name_lower):
             return False
 
         # Rule 4: Check host-specific ignore rules
-        host_names = [h.name.lower()
-                      for h in problem.hosts] if problem.hosts else []
-        for rule in self.host_ignores:
-            sub = rule.get("substring", "").lower()
-            host = rule.get("hostname", "").lower()
-            if sub and host and sub in name_lower:
-                if any(host in h for h in host_names):
+        if self._host_ignores and host_names:
+            for host, pattern in self._host_ignores.items():
+                if any(host in h for h in host_names) and pattern.search(name_lower):
                     return False
 
         return True
+
+
+class ProblemRouter:
+    """
+    Runs a set of filters over the problem list in a single pass.
+
+    Each problem is lowercased once and only offered to the filters that
+    allow its severity. One matcher over the keywords of every filter is
+    tried first: when none of them occur in the name, no filter needs its own
+    matchers, and the result only depends on whether it has include rules.
+    Pass the same ProblemFilter for channels with identical rules and they
+    share one result list.
+    """
+
+    def __init__(self, filters: Iterable[ProblemFilter]):
+        self.filters: List[ProblemFilter] = list({id(f): f for f in filters}.values())
+        self._by_severity: Dict[int, List[ProblemFilter]] = {}
+        for f in self.filters:
+            for sev in f.allowed_severities:
+                self._by_severity.setdefault(sev, []).append(f)
+        self._any_keyword = compile_substrings(
+            sorted(set().union(*(f.keywords for f in self.filters))))
+
+    def route(self, problems_with_meta: List[Tuple[Problem, str, str]]) -> Dict[ProblemFilter, list]:
+        """Matching (problem, host_name, ip) items for each filter, in input order."""
+        results: Dict[ProblemFilter, list] = {f: [] for f in self.filters}
+
+        for item in problems_with_meta:
+            problem = item[0]
+            candidates = self._by_severity.get(problem.severity)
+            if not candidates:
+                continue
+
+            name_lower = problem.name.lower()
+            if self._any_keyword is None or not self._any_keyword.search(name_lower):
+                for f in candidates:
+                    if f._include is None:
+                        results[f].append(item)
+                continue
+
+            host_names = [h.name.lower() for h in problem.hosts] if problem.hosts else []
+            for f in candidates:
+                if f._matches(problem.severity, name_lower, host_names):
+                    results[f].append(item)
+
+        return results
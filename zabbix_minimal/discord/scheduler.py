@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# (requests, per seconds) for each kind of call, per bot token and channel
+ROUTE_LIMITS: Dict[str, Tuple[int, float]] = {
+    "send": (5, 5.0),
+    "edit": (5, 5.0),
+    "delete": (5, 1.0),
+    "bulk_delete": (1, 1.0),
+}
+GLOBAL_LIMIT: Tuple[int, float] = (50, 1.0)  # per bot token
+
+
+class _Bucket:
+    """Token bucket that can also be blocked outright after a 429."""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        self._refill(now)
+        ready = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(ready, self.blocked_until)
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass(order=True)
+class _Job:
+    sort_key: Tuple[int, int]  # (-severity, sequence): Disaster first, then FIFO
+    severity: int = field(compare=False)
+    route: Tuple[Hashable, str, Hashable] = field(compare=False)
+    call: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    submitted: float = field(compare=False)
+
+
+class RateLimitScheduler:
+    """
+    Single queue every Discord send/edit/delete goes through.
+
+    Work is kept per route (bot token, kind of call, channel) and dispatched
+    highest severity first among the routes whose route bucket and global
+    (per token) bucket have capacity, so a rate-limited route never holds up
+    unrelated work, and Disaster updates never wait behind Information deletes.
+    """
+
+    def __init__(
+        self,
+        route_limits: Dict[str, Tuple[int, float]] | None = None,
+        global_limit: Tuple[int, float] = GLOBAL_LIMIT,
+    ):
+        self.route_limits = {**ROUTE_LIMITS, **(route_limits or {})}
+        self.global_limit = global_limit
+
+        self._queues: Dict[Tuple, List[_Job]] = {}
+        self._route_buckets: Dict[Tuple, _Bucket] = {}
+        self._global_buckets: Dict[Hashable, _Bucket] = {}
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self._running: set = set()
+
+        self.started = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        bucket: Hashable,
+        kind: str,
+        route: Hashable,
+        severity: int = 0,
+    ) -> Any:
+        """Queue a call and wait for its result (or exception)."""
+        job = _Job(
+            sort_key=(-severity, next(self._seq)),
+            severity=severity,
+            route=(bucket, kind, route),
+            call=call,
+            future=asyncio.get_running_loop().create_future(),
+            submitted=time.monotonic(),
+        )
+        self._push(job)
+        return await job.future
+
+    def stats(self) -> Dict[str, Any]:
+        by_severity: Dict[int, int] = {}
+        for queue in self._queues.values():
+            for job in queue:
+                by_severity[job.severity] = by_severity.get(job.severity, 0) + 1
+        return {
+            "queued": sum(by_severity.values()),
+            "queued_by_severity": by_severity,
+            "in_flight": len(self._running),
+            "started": self.started,
+            "rate_limited": self.rate_limited,
+            "avg_wait": self.total_wait / self.started if self.started else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+    async def close(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        for queue in self._queues.values():
+            for job in queue:
+                if not job.future.done():
+                    job.future.cancel()
+        self._queues.clear()
+
+    # ── Dispatching ────────────────────────────────────────────────────────────
+
+    def _push(self, job: _Job):
+        heapq.heappush(self._queues.setdefault(job.route, []), job)
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+
+    def _buckets(self, route: Tuple) -> Tuple[_Bucket, _Bucket]:
+        bucket, kind, _ = route
+        if route not in self._route_buckets:
+            self._route_buckets[route] = _Bucket(*self.route_limits.get(kind, ROUTE_LIMITS["send"]))
+        if bucket not in self._global_buckets:
+            self._global_buckets[bucket] = _Bucket(*self.global_limit)
+        return self._route_buckets[route], self._global_buckets[bucket]
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            best: _Job | None = None
+            next_ready: float | None = None
+
+            for route, queue in list(self._queues.items()):
+                while queue and queue[0].future.done():  # submitter gave up
+                    heapq.heappop(queue)
+                if not queue:
+                    del self._queues[route]
+                    continue
+                route_bucket, global_bucket = self._buckets(route)
+                ready = max(route_bucket.ready_at(now), global_bucket.ready_at(now))
+                if ready <= now:
+                    if best is None or queue[0] < best:
+                        best = queue[0]
+                elif next_ready is None or ready < next_ready:
+                    next_ready = ready
+
+            if best is not None:
+                heapq.heappop(self._queues[best.route])
+                route_bucket, global_bucket = self._buckets(best.route)
+                route_bucket.take(now)
+                global_bucket.take(now)
+                task = asyncio.create_task(self._run(best))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                continue
+
+            timeout = None if next_ready is None else next_ready - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: _Job):
+        wait = time.monotonic() - job.submitted
+        self.started += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+        try:
+            result = await job.call()
+        except discord.RateLimited as e:
+            # Block just this route and put the job back in line
+            self.rate_limited += 1
+            route_bucket, _ = self._buckets(job.route)
+            route_bucket.blocked_until = time.monotonic() + e.retry_after
+            logger.warning(f"Route {job.route[1:]} rate limited for {e.retry_after:.1f}s")
+            self._push(job)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
@@ -1,10 +1,12 @@
 import discord
+import aiohttp
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Tuple
 
 from ..models import Problem
+from .scheduler import RateLimitScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -20,46 +22,148 @@ SEVERITY_MAP = {
 
 BATCH_SIZE = 20  # Max problems per embed (Discord allows 25 fields; 20 is safe)
 
+MAX_EMBEDS_PER_MESSAGE = 10   # Discord limit
+MAX_MESSAGE_CHARS = 6000      # Discord limit on title + field + footer text across all embeds
+
+BULK_DELETE_MAX = 100                                  # Discord bulk-delete limit per request
+BULK_DELETE_MAX_AGE = timedelta(days=14, minutes=-5)  # older messages can't be bulk-deleted
+
+# 429s asking for a longer wait raise RateLimited to the scheduler instead of
+# being slept on inside discord.py's HTTP client
+MAX_INLINE_RATELIMIT = 0.5  # seconds
+
+# A message chunk is the list of embeds in one message, each a list of problems
+Meta = Tuple[Problem, str, str]  # (problem, host_name, ip)
+MessageChunk = List[List[Meta]]
+
+
+def _batch_title(severity: int, chunk_index: int, total_chunks: int) -> str:
+    sev = SEVERITY_MAP.get(severity, SEVERITY_MAP[0])
+    title = f"{sev['emoji']} {sev['name']} Problems"
+    if total_chunks > 1:
+        title += f"  ({chunk_index + 1}/{total_chunks})"
+    return title
+
+
+def _batch_footer(count: int) -> str:
+    return f"Zabbix Monitor • {count} problem(s)"
+
+
+def _field_text(problem: Problem, host_name: str, ip: str) -> Tuple[str, str]:
+    """Field (name, value) exactly as it is sent to Discord."""
+    field_name = f"Host: {host_name}  |  IP: {ip}"[:256]
+    field_value = f"`{problem.eventid}` {problem.name}"[:1024]
+    return field_name, field_value
+
+
+# Worst-case title/footer length, reserved once per message
+_TITLE_RESERVE = max(len(_batch_title(s, 98, 99)) for s in SEVERITY_MAP)
+_FOOTER_RESERVE = len(_batch_footer(99999))
+
+
+def _pack_messages(problems_with_meta: List[Meta]) -> List[MessageChunk]:
+    """
+    Pack a severity group into as few messages as Discord allows.
+
+    Each message holds up to MAX_EMBEDS_PER_MESSAGE embeds of up to BATCH_SIZE
+    fields, and its measured field text plus one title and one footer stays
+    within MAX_MESSAGE_CHARS.
+    """
+    budget = MAX_MESSAGE_CHARS - _TITLE_RESERVE - _FOOTER_RESERVE
+    messages: List[MessageChunk] = []
+    embeds: MessageChunk = []
+    fields: List[Meta] = []
+    used = 0
+
+    for item in problems_with_meta:
+        field_name, field_value = _field_text(*item)
+        size = len(field_name) + len(field_value)
+        fits_message = used + size <= budget
+
+        if fields and len(fields) < BATCH_SIZE and fits_message:
+            fields.append(item)
+            used += size
+            continue
+
+        if fields and len(embeds) + 1 < MAX_EMBEDS_PER_MESSAGE and fits_message:
+            embeds.append(fields)
+            fields = [item]
+            used += size
+            continue
+
+        # Start a new message
+        if fields:
+            embeds.append(fields)
+            messages.append(embeds)
+        embeds = []
+        fields = [item]
+        used = size
+
+    if fields:
+        embeds.append(fields)
+        messages.append(embeds)
+    return messages
+
 
 def _build_batch_embed(
     problems_with_meta: List[Tuple[Problem, str, str]],   # (problem, host_name, ip)
     severity: int,
     chunk_index: int,
     total_chunks: int,
+    title: bool = True,
+    footer: bool = True,
+    count: int | None = None,
 ) -> discord.Embed:
     """
     Build one embed for a batch of problems at the same severity.
 
     problems_with_meta: list of (Problem, hostname, ip) tuples.
+    In a message of several embeds only the first has the title and only the
+    last the footer, which then counts the problems of the whole message.
     """
     sev = SEVERITY_MAP.get(severity, SEVERITY_MAP[0])
-    title = f"{sev['emoji']} {sev['name']} Problems"
-    if total_chunks > 1:
-        title += f"  ({chunk_index + 1}/{total_chunks})"
 
-    embed = discord.Embed(
-        title=title,
-        color=sev["color"],
-        timestamp=datetime.utcnow(),
-    )
+    embed = discord.Embed(color=sev["color"])
+    if title:
+        embed.title = _batch_title(severity, chunk_index, total_chunks)
 
-    for problem, host_name, ip in problems_with_meta:
-        field_name = f"Host: {host_name}  |  IP: {ip}"
-        field_value = f"`{problem.eventid}` {problem.name}"[:1024]
-        embed.add_field(name=field_name[:256], value=field_value, inline=False)
+    for item in problems_with_meta:
+        field_name, field_value = _field_text(*item)
+        embed.add_field(name=field_name, value=field_value, inline=False)
 
-    count = len(problems_with_meta)
-    embed.set_footer(text=f"Zabbix Monitor • {count} problem(s)")
+    if footer:
+        embed.timestamp = datetime.utcnow()
+        embed.set_footer(text=_batch_footer(len(problems_with_meta) if count is None else count))
     return embed
 
 
+def _build_message_embeds(
+    chunk: MessageChunk,
+    severity: int,
+    chunk_index: int,
+    total_chunks: int,
+) -> List[discord.Embed]:
+    """Build the embeds of one packed message, one _build_batch_embed per group."""
+    count = sum(len(group) for group in chunk)
+    last = len(chunk) - 1
+    return [
+        _build_batch_embed(
+            group, severity, chunk_index, total_chunks,
+            title=i == 0, footer=i == last, count=count,
+        )
+        for i, group in enumerate(chunk)
+    ]
+
+
 class DiscordBot:
     """Sends batched problem messages in Discord and cleans up old ones."""
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, scheduler: RateLimitScheduler | None = None):
         self.token = token
+        self._scheduler = scheduler
         self._client: discord.Client | None = None
         self._ready = asyncio.Event()
+        self._connect_lock = asyncio.Lock()
 
     # ── Connection ─────────────────────────────────────────────────────────────
 
@@ -67,8 +171,16 @@ class DiscordBot:
         if self._client and not self._client.is_closed():
             return
 
+        # Concurrent refreshes share one bot: only the first one connects
+        async with self._connect_lock:
+            if self._client and not self._client.is_closed():
+                return
+            await self._connect()
+
+    async def _connect(self):
+        self._ready.clear()
         intents = discord.Intents.default()
-        self._client = discord.Client(intents=intents)
+        self._client = self._new_client(intents)
 
         @self._client.event
         async def on_ready():
@@ -78,28 +190,153 @@ class DiscordBot:
         asyncio.create_task(self._client.start(self.token))
         await asyncio.wait_for(self._ready.wait(), timeout=30)
 
+    @staticmethod
+    def _new_client(intents: discord.Intents) -> discord.Client:
+        client = discord.Client(intents=intents)
+        # Client(max_ratelimit_timeout=...) won't go below 30s; set it directly
+        client.http.max_ratelimit_timeout = MAX_INLINE_RATELIMIT
+        return client
+
     async def _get_channel(self, channel_id: int):
         channel = self._client.get_channel(channel_id)
         if not channel:
             channel = await self._client.fetch_channel(channel_id)
         return channel
 
+    # ── Transport: the four REST calls, overridden by the other backends ───────
+
+    supports_bulk_delete = True
+
+    async def _send_message(self, channel_id: int, embeds: List[discord.Embed]) -> int:
+        channel = await self._get_channel(int(channel_id))
+        msg = await channel.send(embeds=embeds)
+        return msg.id
+
+    async def _edit_message(self, channel_id: int, message_id: int, embeds: List[discord.Embed]):
+        channel = await self._get_channel(int(channel_id))
+        await channel.get_partial_message(int(message_id)).edit(embeds=embeds)
+
+    async def _delete_message(self, channel_id: int, message_id: int):
+        channel = await self._get_channel(int(channel_id))
+        await channel.get_partial_message(int(message_id)).delete()
+
+    async def _bulk_delete(self, channel_id: int, message_ids: List[int]):
+        channel = await self._get_channel(int(channel_id))
+        await channel.delete_messages([discord.Object(id=int(m)) for m in message_ids])
+
+    async def _request(self, kind: str, channel_id: int, severity: int, call):
+        """Run a REST call through the shared rate-limit scheduler, if any."""
+        if self._scheduler is None:
+            return await call()
+        return await self._scheduler.submit(
+            call, bucket=self.token, kind=kind, route=int(channel_id), severity=severity)
+
     # ── Public API ─────────────────────────────────────────────────────────────
 
-    async def delete_messages(self, channel_id: int, message_ids: List[int]):
-        """Delete a list of Discord messages (silently skip if already gone)."""
+    async def delete_messages(self, channel_id: int, message_ids: List[int], severity: int = 0):
+        """
+        Delete a list of Discord messages (silently skip if already gone).
+
+        Messages younger than 14 days go through the bulk-delete endpoint in
+        groups of up to 100; single and older messages are deleted by ID
+        without fetching them first.
+        """
+        if not message_ids:
+            return
+
         await self._ensure_client()
-        channel = await self._get_channel(channel_id)
-        for msg_id in message_ids:
+
+        if self.supports_bulk_delete:
+            cutoff = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+            young = [m for m in message_ids if discord.utils.snowflake_time(int(m)) > cutoff]
+        else:
+            young = []
+        singles = [m for m in message_ids if m not in young]
+
+        for i in range(0, len(young), BULK_DELETE_MAX):
+            batch = young[i:i + BULK_DELETE_MAX]
+            if len(batch) < 2:
+                singles.extend(batch)
+                continue
             try:
-                msg = await channel.fetch_message(msg_id)
-                await msg.delete()
+                await self._request(
+                    "bulk_delete", channel_id, severity,
+                    lambda batch=batch: self._bulk_delete(channel_id, batch),
+                )
+                logger.debug(f"Bulk-deleted {len(batch)} messages")
+            except Exception:
+                logger.warning(f"Bulk delete of {len(batch)} messages failed, deleting one by one")
+                singles.extend(batch)
+
+        for msg_id in singles:
+            try:
+                await self._request(
+                    "delete", channel_id, severity,
+                    lambda msg_id=msg_id: self._delete_message(channel_id, msg_id),
+                )
                 logger.debug(f"Deleted message {msg_id}")
             except discord.NotFound:
                 pass
             except Exception:
                 logger.exception(f"Could not delete message {msg_id}")
 
+    async def send_chunk(
+        self,
+        channel_id: int,
+        chunk: MessageChunk,
+        severity: int,
+        chunk_index: int,
+        total_chunks: int,
+    ) -> int | None:
+        """Send one chunk as a new message. Returns its ID, or None on failure."""
+        await self._ensure_client()
+        embeds = _build_message_embeds(chunk, severity, chunk_index, total_chunks)
+        try:
+            msg_id = await self._request(
+                "send", channel_id, severity, lambda: self._send_message(channel_id, embeds))
+            logger.info(
+                f"Sent batch chunk {chunk_index + 1}/{total_chunks} "
+                f"sev={severity} ({sum(len(g) for g in chunk)} problems, "
+                f"{len(embeds)} embeds) → msg {msg_id}"
+            )
+            return msg_id
+        except Exception:
+            logger.exception(f"Failed to send batch chunk {chunk_index}")
+            return None
+
+    async def edit_chunk(
+        self,
+        channel_id: int,
+        message_id: int,
+        chunk: MessageChunk,
+        severity: int,
+        chunk_index: int,
+        total_chunks: int,
+    ) -> bool | None:
+        """
+        Replace the embeds of an existing message in place.
+        Returns True once edited, False when the message is gone, and None
+        when the edit failed for another reason (the message is still there).
+        """
+        await self._ensure_client()
+        embeds = _build_message_embeds(chunk, severity, chunk_index, total_chunks)
+        try:
+            await self._request(
+                "edit", channel_id, severity,
+                lambda: self._edit_message(channel_id, message_id, embeds),
+            )
+            logger.info(
+                f"Edited batch chunk {chunk_index + 1}/{total_chunks} "
+                f"sev={severity} ({sum(len(g) for g in chunk)} problems, "
+                f"{len(embeds)} embeds) → msg {message_id}"
+            )
+            return True
+        except discord.NotFound:
+            return False
+        except Exception:
+            logger.exception(f"Could not edit message {message_id}")
+            return None
+
     async def send_batch(
         self,
         channel_id: int,
@@ -107,35 +344,79 @@ class DiscordBot:
         severity: int,
     ) -> List[int]:
         """
-        Send problems as one or more embeds (chunks of BATCH_SIZE).
-        Returns list of Discord message IDs that were sent.
+        Send problems as one or more messages, each packed with as many
+        embeds as Discord allows. Returns list of Discord message IDs that were sent.
         """
         if not problems_with_meta:
             return []
 
-        await self._ensure_client()
-        channel = await self._get_channel(int(channel_id))
-
-        chunks = [
-            problems_with_meta[i:i + BATCH_SIZE]
-            for i in range(0, len(problems_with_meta), BATCH_SIZE)
-        ]
+        chunks = _pack_messages(problems_with_meta)
         sent_ids: List[int] = []
 
         for idx, chunk in enumerate(chunks):
-            embed = _build_batch_embed(chunk, severity, idx, len(chunks))
-            try:
-                msg = await channel.send(embed=embed)
-                sent_ids.append(msg.id)
-                logger.info(
-                    f"Sent batch chunk {idx + 1}/{len(chunks)} "
-                    f"sev={severity} ({len(chunk)} problems) → msg {msg.id}"
-                )
-            except Exception:
-                logger.exception(f"Failed to send batch chunk {idx}")
+            msg_id = await self.send_chunk(channel_id, chunk, severity, idx, len(chunks))
+            if msg_id is not None:
+                sent_ids.append(msg_id)
 
         return sent_ids
 
     async def close(self):
         if self._client and not self._client.is_closed():
-            await self._client.close()
\ No newline at end of file
+            await self._client.close()
+
+
+class DiscordRestBot(DiscordBot):
+    """
+    Same API as DiscordBot, but REST only: the client logs in (one HTTP call)
+    and never opens a gateway websocket or waits for on_ready. discord.py's
+    pooled HTTP session for the token is the only connection it holds.
+    """
+
+    async def _connect(self):
+        self._client = self._new_client(discord.Intents.none())
+        await self._client.login(self.token)
+        logger.info(f"Discord REST client ready as {self._client.user}")
+
+    async def _get_channel(self, channel_id: int):
+        # No gateway cache to look in, and no need to fetch: IDs are enough
+        return self._client.get_partial_messageable(channel_id)
+
+    async def _bulk_delete(self, channel_id: int, message_ids: List[int]):
+        # PartialMessageable has no delete_messages; call the endpoint directly
+        await self._client.http.delete_messages(int(channel_id), [int(m) for m in message_ids])
+
+
+class DiscordWebhookBot(DiscordBot):
+    """
+    Same API as DiscordBot, delivering through a channel webhook instead of a
+    bot token. Sends use ?wait=true so the message ID comes back, edits PATCH
+    the webhook's own messages. Webhooks can't bulk-delete, so deletes go one
+    by one. The scheduler buckets it by webhook URL, apart from any bot.
+    """
+
+    supports_bulk_delete = False
+
+    def __init__(self, webhook_url: str, scheduler: RateLimitScheduler | None = None):
+        super().__init__(webhook_url, scheduler=scheduler)
+        self.webhook_url = webhook_url
+        self._session: aiohttp.ClientSession | None = None
+        self._webhook: discord.Webhook | None = None
+
+    async def _ensure_client(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._webhook = discord.Webhook.from_url(self.webhook_url, session=self._session)
+
+    async def _send_message(self, channel_id: int, embeds: List[discord.Embed]) -> int:
+        msg = await self._webhook.send(embeds=embeds, wait=True)
+        return msg.id
+
+    async def _edit_message(self, channel_id: int, message_id: int, embeds: List[discord.Embed]):
+        await self._webhook.edit_message(int(message_id), embeds=embeds)
+
+    async def _delete_message(self, channel_id: int, message_id: int):
+        await self._webhook.delete_message(int(message_id))
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
\ No newline at end of file
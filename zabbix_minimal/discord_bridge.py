@@ -1,76 +1,361 @@
-import sqlite3
+import asyncio
+import hashlib
+import json
 import logging
+import re
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Awaitable, Callable, Dict, List, Tuple
 
-from .discord.sender import DiscordBot
-from .discord.filters import ProblemFilter
+from .discord.sender import (
+    SEVERITY_MAP, DiscordBot, DiscordRestBot, DiscordWebhookBot, MessageChunk, _pack_messages,
+)
+from .discord.scheduler import RateLimitScheduler
+from .discord.filters import ProblemFilter, ProblemRouter
 from .models import Problem
+from .monitor import MonitorSnapshot
+from .tracking_store import TrackingStore
 
 logger = logging.getLogger(__name__)
 
+# Refresh modes
+MODE_RECONCILE = "reconcile"  # edit changed chunks, send new ones, delete surplus
+MODE_REPLACE = "replace"      # delete every tracked message, then send fresh
+MODE_SWAP = "swap"            # send fresh, then delete the old messages in the background
+
+# Chunk hash recorded for a message whose edit failed: never matches, so the
+# edit is retried and the group is not marked complete
+_EDIT_FAILED = ""
+
+
+def _chunk_fingerprint(
+    chunk: MessageChunk,
+    chunk_index: int,
+    total_chunks: int,
+) -> str:
+    """Stable hash of everything that ends up in a chunk's embeds."""
+    h = hashlib.sha1(f"{chunk_index}/{total_chunks}".encode())
+    for group in chunk:
+        h.update(b"\x1d")
+        for problem, host_name, ip in group:
+            h.update(f"\x1e{problem.eventid}\x1f{problem.name}\x1f{host_name}\x1f{ip}".encode())
+    return h.hexdigest()
+
+
+def _destination(channel_config: dict) -> Tuple[str, str, str]:
+    """Where and as whom a channel's messages are posted: (channel, webhook URL, bot token)."""
+    webhook_url = channel_config.get("webhook_url") or ""
+    return (
+        str(channel_config["discord_channel_id"]),
+        webhook_url,
+        "" if webhook_url else channel_config["bot_token"],
+    )
+
+
+def _group_fingerprint(destination: Tuple[str, str, str], chunks: List[MessageChunk]) -> str:
+    """Stable hash of a whole severity group as it would be rendered and delivered."""
+    h = hashlib.sha1("\x1f".join(destination).encode())
+    total = len(chunks)
+    for idx, chunk in enumerate(chunks):
+        h.update(_chunk_fingerprint(chunk, idx, total).encode())
+    return h.hexdigest()
+
 
 class DiscordBridge:
     """
     On every poll cycle:
     1. Receive all active problems (already enriched with host/IP metadata)
-    2. For each enabled channel: filter → group by severity → delete old → send fresh
+    2. For each enabled channel: filter → group by severity → reconcile messages
+
+    In reconcile mode (default) each (channel, severity, chunk) message is kept
+    and only edited when its content changed; new trailing chunks are sent and
+    surplus ones deleted. Replace mode deletes everything and sends fresh.
+    Swap mode sends fresh first and deletes the old messages afterwards in
+    the background, so the channel is never left empty in between.
+
+    Either way, a severity group whose fingerprint matches the last committed
+    one is skipped entirely: no SQLite writes and no Discord traffic.
+
+    Channels, and the severity groups within a channel, are refreshed
+    concurrently; at most max_concurrency groups talk to Discord at once.
+
+    With rest_only=True bots never open a gateway connection (DiscordRestBot).
+    Channels with a webhook_url are delivered through that webhook instead.
+
+    Message tracking lives in memory; changes are flushed to SQLite every
+    flush_interval seconds in the background and once more on close().
     """
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        mode: str = MODE_RECONCILE,
+        max_concurrency: int = 8,
+        rest_only: bool = False,
+        flush_interval: float = 5.0,
+    ):
+        if mode not in (MODE_RECONCILE, MODE_REPLACE, MODE_SWAP):
+            raise ValueError(f"Unknown refresh mode: {mode}")
         self.db_path = db_path
+        self.store = TrackingStore(db_path)
+        self.flush_interval = flush_interval
+        self._flusher: asyncio.Task | None = None
+        self.mode = mode
+        self.rest_only = rest_only
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Every Discord call from every bot is paced and prioritised here
+        self.scheduler = RateLimitScheduler()
         self._bots: Dict[str, DiscordBot] = {}
+        # (channel_config_id, severity) → fingerprint per tracked chunk
+        self._chunk_hashes: Dict[Tuple[int, int], List[str]] = {}
+        # (channel_config_id, severity) → last committed group fingerprint
+        self._group_fingerprints: Dict[Tuple[int, int], str] | None = None
+        # Enabled channels as of _channels_version (SQLite data_version)
+        self._channels: List[dict] | None = None
+        self._channels_version: int | None = None
+        # Filter columns → compiled ProblemFilter, rebuilt when channels change
+        self._filters: Dict[tuple, ProblemFilter] = {}
+        # All enabled channels' filters, compiled together
+        self._router: ProblemRouter | None = None
+        # Filter → severity → eventid → (problem, host_name, ip), as of the
+        # last full refresh plus deltas; None until a full refresh has run
+        self._routed: Dict[ProblemFilter, Dict[int, Dict[str, Tuple[Problem, str, str]]]] | None = None
+        # (channel_config_id, severity) groups whose last refresh didn't fully
+        # land; process_changes retries them even without new deltas
+        self._stale: set = set()
+        # Swap-mode deletes still running
+        self._background: set = set()
 
     # ── DB helpers ──────────────────────────────────────────────────────────────
 
-    def _get_db(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-
     def load_channels(self) -> List[dict]:
-        conn = self._get_db()
-        rows = conn.execute("SELECT * FROM channels WHERE enabled = 1").fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        """
+        Enabled channel configs. Re-read only when another connection (the
+        dashboard) has committed since the last read; the bridge's own
+        tracking writes go through the same connection and don't count.
+        """
+        version = self.store.data_version()
+        if self._channels is None or version != self._channels_version:
+            rows = self.store.fetch_all("SELECT * FROM channels WHERE enabled = 1")
+            previous = {c["id"]: c for c in self._channels or []}
+            self._channels_version = version
+            self._filters.clear()
+            self._router = None
+            self._routed = None
+            self._channels = []
+            for row in rows:
+                channel_config = dict(row)
+                try:
+                    self._filter_for(channel_config)
+                except (ValueError, TypeError, AttributeError, RecursionError, re.error):
+                    logger.exception(f"Skipping channel '{channel_config['name']}': invalid filter rules")
+                    continue
+                self._channels.append(channel_config)
+                old = previous.get(channel_config["id"])
+                if old is not None and _destination(old) != _destination(channel_config):
+                    self._retire_destination(old)
+            logger.info(f"Loaded {len(self._channels)} enabled channel(s)")
+        return self._channels
+
+    def _retire_destination(self, old_config: dict):
+        """
+        The channel now posts elsewhere or as someone else: delete its tracked
+        messages through the previous sender (in the background) and forget
+        them, so the next refresh starts fresh at the new destination.
+        """
+        config_id = old_config["id"]
+        for sev in SEVERITY_MAP:
+            old_ids = self._get_tracked_messages(config_id, sev)
+            self._chunk_hashes.pop((config_id, sev), None)
+            self._stale.discard((config_id, sev))
+            if (config_id, sev) in self._load_fingerprints():
+                self._save_fingerprint(config_id, sev, None)
+            if not old_ids:
+                continue
+            self._set_tracking(config_id, sev, [])
+            task = asyncio.create_task(self._bot_for(old_config).delete_messages(
+                int(old_config["discord_channel_id"]), old_ids, severity=sev))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        logger.info(f"Channel '{old_config['name']}' changed destination, removing its old messages")
+
+    def _filter_for(self, channel_config: dict) -> ProblemFilter:
+        """Compiled filter for a channel, shared by channels with identical rules."""
+        columns = ("allowed_severities", "include_substrings", "exclude_substrings", "host_ignores")
+        key = tuple(
+            v if isinstance(v, str) else json.dumps(v)
+            for v in (channel_config[c] for c in columns)
+        )
+        if key not in self._filters:
+            self._filters[key] = ProblemFilter({c: channel_config[c] for c in columns})
+        return self._filters[key]
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.store.flush()
+            except Exception:
+                logger.exception("Failed to flush message tracking, retrying next interval")
 
     def _get_bot(self, token: str) -> DiscordBot:
         if token not in self._bots:
-            self._bots[token] = DiscordBot(token)
+            bot_class = DiscordRestBot if self.rest_only else DiscordBot
+            self._bots[token] = bot_class(token, scheduler=self.scheduler)
         return self._bots[token]
 
+    def _bot_for(self, channel_config: dict) -> DiscordBot:
+        """Webhook delivery when the channel has a webhook URL, else its bot token."""
+        webhook_url = channel_config.get("webhook_url")
+        if not webhook_url:
+            return self._get_bot(channel_config["bot_token"])
+        if webhook_url not in self._bots:
+            self._bots[webhook_url] = DiscordWebhookBot(webhook_url, scheduler=self.scheduler)
+        return self._bots[webhook_url]
+
     # ── Tracking helpers ────────────────────────────────────────────────────────
 
     def _get_tracked_messages(self, channel_config_id: int, severity: int) -> List[int]:
         """Return Discord message IDs currently tracked for this (channel, severity)."""
-        conn = self._get_db()
-        rows = conn.execute(
-            "SELECT discord_message_id FROM message_tracking "
-            "WHERE channel_config_id = ? AND severity = ? ORDER BY id",
-            (channel_config_id, severity),
-        ).fetchall()
-        conn.close()
-        return [int(r["discord_message_id"]) for r in rows]
-
-    def _clear_tracking(self, channel_config_id: int, severity: int):
-        conn = self._get_db()
-        conn.execute(
-            "DELETE FROM message_tracking WHERE channel_config_id = ? AND severity = ?",
-            (channel_config_id, severity),
-        )
-        conn.commit()
-        conn.close()
-
-    def _save_tracking(self, channel_config_id: int, severity: int, message_ids: List[int]):
-        conn = self._get_db()
-        for msg_id in message_ids:
-            conn.execute(
-                "INSERT INTO message_tracking (channel_config_id, severity, discord_message_id) "
-                "VALUES (?, ?, ?)",
-                (channel_config_id, severity, str(msg_id)),
-            )
-        conn.commit()
-        conn.close()
+        return self.store.get_messages(channel_config_id, severity)
+
+    def _set_tracking(self, channel_config_id: int, severity: int, message_ids: List[int]):
+        """Update the tracked messages; written to SQLite by the next flush."""
+        self.store.set_messages(channel_config_id, severity, message_ids)
+
+    # ── Fingerprint helpers ─────────────────────────────────────────────────────
+
+    def _load_fingerprints(self) -> Dict[Tuple[int, int], str]:
+        """Load committed group fingerprints once; the bridge is the only writer."""
+        if self._group_fingerprints is None:
+            self._group_fingerprints = self.store.load_fingerprints()
+        return self._group_fingerprints
+
+    def _save_fingerprint(self, channel_config_id: int, severity: int, fingerprint: str | None):
+        fingerprints = self._load_fingerprints()
+        if fingerprint is None:
+            fingerprints.pop((channel_config_id, severity), None)
+        else:
+            fingerprints[(channel_config_id, severity)] = fingerprint
+        self.store.set_fingerprint(channel_config_id, severity, fingerprint)
+
+    # ── Per-severity refresh strategies ─────────────────────────────────────────
+
+    async def _replace_severity(
+        self,
+        bot: DiscordBot,
+        channel_id: int,
+        config_id: int,
+        sev: int,
+        group: List[Tuple[Problem, str, str]],
+    ) -> List[int]:
+        """Delete every tracked message for this severity, then send fresh."""
+        old_ids = self._get_tracked_messages(config_id, sev)
+        if old_ids:
+            await bot.delete_messages(int(channel_id), old_ids, severity=sev)
+
+        new_ids: List[int] = []
+        if group:
+            new_ids = await bot.send_batch(channel_id, group, sev)
+        self._set_tracking(config_id, sev, new_ids)
+        return new_ids
+
+    async def _swap_severity(
+        self,
+        bot: DiscordBot,
+        channel_id: int,
+        config_id: int,
+        sev: int,
+        group: List[Tuple[Problem, str, str]],
+    ) -> List[int]:
+        """
+        Send fresh messages, commit them, then delete the old ones in the
+        background. If a send fails the old messages stay tracked next to the
+        new ones, so the retry next cycle replaces both.
+        """
+        old_ids = self._get_tracked_messages(config_id, sev)
+        chunks = _pack_messages(group)
+
+        new_ids: List[int] = []
+        if chunks:
+            new_ids = await bot.send_batch(channel_id, group, sev)
+
+        if len(new_ids) < len(chunks):
+            self._set_tracking(config_id, sev, old_ids + new_ids)
+            return new_ids
+
+        self._set_tracking(config_id, sev, new_ids)
+
+        if old_ids:
+            task = asyncio.create_task(
+                bot.delete_messages(int(channel_id), old_ids, severity=sev))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return new_ids
+
+    async def _reconcile_severity(
+        self,
+        bot: DiscordBot,
+        channel_id: int,
+        config_id: int,
+        sev: int,
+        group: List[Tuple[Problem, str, str]],
+    ) -> List[int]:
+        """
+        Edit only the chunks whose content changed, send new trailing chunks
+        and delete surplus ones. An unchanged group makes no Discord calls.
+        """
+        key = (config_id, sev)
+        old_ids = self._get_tracked_messages(config_id, sev)
+        old_hashes = self._chunk_hashes.get(key, [])
+
+        chunks = _pack_messages(group)
+        total = len(chunks)
+
+        kept_ids: List[int] = []
+        kept_hashes: List[str] = []
+        dropped: set = set()
+
+        for idx, chunk in enumerate(chunks):
+            fingerprint = _chunk_fingerprint(chunk, idx, total)
+
+            if idx < len(old_ids):
+                msg_id = old_ids[idx]
+                if idx < len(old_hashes) and old_hashes[idx] == fingerprint:
+                    kept_ids.append(msg_id)
+                    kept_hashes.append(fingerprint)
+                    continue
+                edited = await bot.edit_chunk(channel_id, msg_id, chunk, sev, idx, total)
+                if edited is not False:
+                    # On a failed edit the old message stays in place for a retry
+                    kept_ids.append(msg_id)
+                    kept_hashes.append(fingerprint if edited else _EDIT_FAILED)
+                    continue
+                # Message is gone — resend it below
+                dropped.add(msg_id)
+
+            new_id = await bot.send_chunk(channel_id, chunk, sev, idx, total)
+            if new_id is None:
+                # Keep order intact; the rest is retried next cycle
+                break
+            kept_ids.append(new_id)
+            kept_hashes.append(fingerprint)
+
+        surplus = [m for m in old_ids if m not in kept_ids and m not in dropped]
+        if surplus:
+            await bot.delete_messages(int(channel_id), surplus, severity=sev)
+
+        if kept_ids != old_ids:
+            self._set_tracking(config_id, sev, kept_ids)
+
+        if kept_ids:
+            self._chunk_hashes[key] = kept_hashes
+        else:
+            self._chunk_hashes.pop(key, None)
+        return kept_ids
 
     # ── Main entry point ────────────────────────────────────────────────────────
 
@@ -78,72 +363,253 @@ class DiscordBridge:
         self,
         channel_config: dict,
         problems_with_meta: List[Tuple[Problem, str, str]],  # (problem, host_name, ip)
+        filtered: List[Tuple[Problem, str, str]] | None = None,
     ):
         """
         Refresh all batch messages for one channel config.
 
         problems_with_meta should be the FULL list of currently active problems,
-        each paired with (hostname, ip).
-        """
-        filter_config = {
-            "allowed_severities": channel_config["allowed_severities"],
-            "include_substrings": channel_config["include_substrings"],
-            "exclude_substrings": channel_config["exclude_substrings"],
-            "host_ignores": channel_config["host_ignores"],
-        }
-        problem_filter = ProblemFilter(filter_config)
-        bot = self._get_bot(channel_config["bot_token"])
-        channel_id = channel_config["discord_channel_id"]
-        config_id = channel_config["id"]
-
-        import json
-        raw_sevs = channel_config["allowed_severities"]
-        if isinstance(raw_sevs, str):
-            allowed_sevs = set(json.loads(raw_sevs))
-        else:
-            allowed_sevs = set(raw_sevs)
+        each paired with (hostname, ip). filtered, when given, is that list
+        already run through this channel's filter (see ProblemRouter).
+        """
+        problem_filter = self._filter_for(channel_config)
 
         # 1. Filter and keep only matching problems (with their meta)
-        filtered = [
-            (p, host, ip)
-            for p, host, ip in problems_with_meta
-            if problem_filter.should_send(p)
-        ]
+        if filtered is None:
+            filtered = [
+                (p, host, ip)
+                for p, host, ip in problems_with_meta
+                if problem_filter.should_send(p)
+            ]
 
         # 2. Group by severity
         by_severity: Dict[int, List[Tuple[Problem, str, str]]] = defaultdict(list)
         for p, host, ip in filtered:
             by_severity[p.severity].append((p, host, ip))
 
-        # 3. For each chosen severity: delete old → send new
-        for sev in sorted(allowed_sevs):
-            group = by_severity.get(sev, [])
+        # 3. For each chosen severity: bring its messages in line with the group
+        await self._refresh_severities(channel_config, {
+            sev: by_severity.get(sev, []) for sev in sorted(problem_filter.allowed_severities)
+        })
 
-            # a. Delete old Discord messages
-            old_ids = self._get_tracked_messages(config_id, sev)
-            if old_ids:
-                await bot.delete_messages(int(channel_id), old_ids)
-
-            # b. Clear old tracking rows
-            self._clear_tracking(config_id, sev)
-
-            # c. Send new batch (only when there are problems at this severity)
-            if group:
-                new_ids = await bot.send_batch(channel_id, group, sev)
-                self._save_tracking(config_id, sev, new_ids)
-                logger.info(
-                    f"[{channel_config['name']}] sev={sev}: "
-                    f"{len(group)} problems → {len(new_ids)} message(s)"
+    async def _refresh_severities(
+        self,
+        channel_config: dict,
+        groups: Dict[int, List[Tuple[Problem, str, str]]],
+    ):
+        """Bring the messages of each given severity group in line with its problems."""
+        bot = self._bot_for(channel_config)
+        channel_id = channel_config["discord_channel_id"]
+        config_id = channel_config["id"]
+
+        self._ensure_flusher()
+        fingerprints = self._load_fingerprints()
+        jobs = []
+        for sev, group in groups.items():
+            chunks = _pack_messages(group)
+
+            # Skip the whole group when nothing that affects rendering changed
+            fingerprint = _group_fingerprint(_destination(channel_config), chunks)
+            if fingerprints.get((config_id, sev)) == fingerprint:
+                continue
+
+            jobs.append((sev, self._refresh_group(
+                channel_config, bot, sev, group, len(chunks), fingerprint)))
+
+        # Severity groups are independent: run them concurrently, and let one
+        # failing group not hold back the others
+        results = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+        for (sev, _), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                self._stale.add((config_id, sev))
+                logger.error(
+                    f"[{channel_config['name']}] sev={sev}: refresh failed",
+                    exc_info=result,
                 )
 
+    async def _refresh_group(
+        self,
+        channel_config: dict,
+        bot: DiscordBot,
+        sev: int,
+        group: List[Tuple[Problem, str, str]],
+        chunk_count: int,
+        fingerprint: str,
+    ):
+        refresh = {
+            MODE_RECONCILE: self._reconcile_severity,
+            MODE_REPLACE: self._replace_severity,
+            MODE_SWAP: self._swap_severity,
+        }[self.mode]
+        config_id = channel_config["id"]
+
+        async with self._semaphore:
+            new_ids = await refresh(
+                bot, channel_config["discord_channel_id"], config_id, sev, group)
+
+        # Only commit the fingerprint once every chunk made it to Discord,
+        # so a partial failure is retried next cycle
+        complete = (
+            len(new_ids) == chunk_count
+            and _EDIT_FAILED not in self._chunk_hashes.get((config_id, sev), ())
+        )
+        self._save_fingerprint(config_id, sev, fingerprint if complete else None)
+        if complete:
+            self._stale.discard((config_id, sev))
+        else:
+            self._stale.add((config_id, sev))
+
+        if group:
+            logger.info(
+                f"[{channel_config['name']}] sev={sev}: "
+                f"{len(group)} problems → {len(new_ids)} message(s)"
+            )
+
     async def process_all_channels(
         self,
         problems_with_meta: List[Tuple[Problem, str, str]],
     ):
-        """Called every poll cycle. Refreshes every enabled channel."""
+        """
+        Called every poll cycle. Every channel's filter runs in one pass over
+        the problems, then every enabled channel is refreshed concurrently.
+        """
         channels = self.load_channels()
+        if self._router is None:
+            self._router = ProblemRouter(self._filter_for(c) for c in channels)
+        routed = self._router.route(problems_with_meta)
+
+        # Remember each filter's matches, so the next cycles can apply deltas
+        self._routed = {}
+        for problem_filter, items in routed.items():
+            by_severity = self._routed[problem_filter] = {}
+            for item in items:
+                by_severity.setdefault(item[0].severity, {})[item[0].eventid] = item
+
+        await self._refresh_channels(channels, [
+            self.refresh_channel(c, problems_with_meta, filtered=routed[self._filter_for(c)])
+            for c in channels
+        ])
+
+    def can_apply_changes(self) -> bool:
+        """
+        True when process_changes can be used: a full refresh has run and
+        channel configs haven't changed since.
+        """
+        self.load_channels()
+        return self._routed is not None
+
+    async def process_changes(
+        self,
+        new_with_meta: List[Tuple[Problem, str, str]],
+        resolved_problems: List[Problem],
+        changed_with_meta: List[Tuple[Problem, str, str]] = (),
+    ):
+        """
+        Delta alternative to process_all_channels. Only new, resolved and
+        changed problems are routed, and only the (channel, severity) groups
+        that gained, lost or hold one of them are re-rendered, plus any group
+        whose last refresh failed. Requires can_apply_changes().
+        """
+        channels = self.load_channels()
+        if self._routed is None:
+            raise RuntimeError("process_changes needs a full process_all_channels first")
+
+        # A changed problem leaves its old groups and is routed again like a new one
+        dirty: set = set()  # (filter, severity)
+        gone = [p.eventid for p in resolved_problems] + [item[0].eventid for item in changed_with_meta]
+        for eventid in gone:
+            for problem_filter, by_severity in self._routed.items():
+                for sev, group in by_severity.items():
+                    if group.pop(eventid, None) is not None:
+                        dirty.add((problem_filter, sev))
+
+        arrived = list(new_with_meta) + list(changed_with_meta)
+        for problem_filter, items in self._router.route(arrived).items():
+            for item in items:
+                sev = item[0].severity
+                self._routed[problem_filter].setdefault(sev, {})[item[0].eventid] = item
+                dirty.add((problem_filter, sev))
+
+        jobs = []
         for channel_config in channels:
-            try:
-                await self.refresh_channel(channel_config, problems_with_meta)
-            except Exception:
-                logger.exception(f"Error refreshing channel '{channel_config['name']}'")
\ No newline at end of file
+            problem_filter = self._filter_for(channel_config)
+            by_severity = self._routed[problem_filter]
+            groups = {
+                sev: sorted(  # same order as a full snapshot (eventid DESC)
+                    by_severity.get(sev, {}).values(),
+                    key=lambda item: int(item[0].eventid), reverse=True,
+                )
+                for sev in sorted(problem_filter.allowed_severities)
+                if (problem_filter, sev) in dirty or (channel_config["id"], sev) in self._stale
+            }
+            if groups:
+                jobs.append((channel_config, self._refresh_severities(channel_config, groups)))
+
+        await self._refresh_channels([c for c, _ in jobs], [job for _, job in jobs])
+
+    async def sync(
+        self,
+        poll: MonitorSnapshot,
+        enrich: Callable[[List[Problem]], Awaitable[List[Tuple[Problem, str, str]]]],
+    ):
+        """
+        Bring Discord in line with one monitor poll. enrich attaches
+        (host_name, ip) to a list of problems.
+
+        A delta poll is applied with process_changes, which also retries
+        groups whose last refresh failed, even on a quiet poll. A full
+        snapshot, or a bridge without delta state, gets a full
+        process_all_channels, which also picks up host and IP changes. When a cycle fails, the delta
+        state is dropped so the next poll refreshes in full instead of
+        losing this poll's changes.
+        """
+        try:
+            if not poll.full and self.can_apply_changes():
+                # Only problems that appeared, went away or changed are enriched and routed
+                if poll.new or poll.resolved or poll.changed:
+                    logger.debug(
+                        f"{len(poll.new)} new, {len(poll.resolved)} resolved, "
+                        f"{len(poll.changed)} changed problems"
+                    )
+                    with_meta = await enrich(list(poll.new) + list(poll.changed))
+                    await self.process_changes(
+                        with_meta[:len(poll.new)], list(poll.resolved), with_meta[len(poll.new):])
+                elif self._stale:
+                    # Nothing changed, but groups whose last refresh failed are retried
+                    await self.process_changes([], [])
+            elif poll.problems:
+                logger.debug(f"{len(poll.problems)} active problems. Refreshing Discord batches...")
+                await self.process_all_channels(await enrich(list(poll.problems)))
+            else:
+                logger.debug("No active problems. Clearing any leftover Discord messages...")
+                await self.process_all_channels([])
+        except Exception:
+            self._routed = None
+            raise
+
+    async def _refresh_channels(self, channels: List[dict], refreshes: list):
+        results = await asyncio.gather(*refreshes, return_exceptions=True)
+        for channel_config, result in zip(channels, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Error refreshing channel '{channel_config['name']}'",
+                    exc_info=result,
+                )
+
+    async def close(self):
+        """
+        Finish background deletes, close every bot connection, stop the
+        scheduler, and write pending tracking to SQLite before closing it.
+        The final write happens even if closing a bot fails.
+        """
+        try:
+            if self._background:
+                await asyncio.gather(*self._background, return_exceptions=True)
+            if self._flusher and not self._flusher.done():
+                self._flusher.cancel()
+                await asyncio.gather(self._flusher, return_exceptions=True)
+            for bot in self._bots.values():
+                await bot.close()
+            await self.scheduler.close()
+        finally:
+            self.store.close()
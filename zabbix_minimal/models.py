@@ -1,11 +1,14 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+# Models are created by the tens of thousands per poll: they use __slots__
+# (no per-instance __dict__) and from_api passes fields positionally.
 
 
 """Host Model"""
 
 
-@dataclass
+@dataclass(slots=True)
 class Host:
     hostid: str
     name: str
@@ -13,11 +16,8 @@ class Host:
 
     @classmethod
     def from_api(cls, data: Dict[str, Any]) -> "Host":
-        return cls(
-            hostid=str(data.get("hostid")),
-            name=data.get("name", "Unknown"),
-            status=int(data.get("status", 1)),
-        )
+        get = data.get
+        return cls(str(get("hostid")), get("name", "Unknown"), int(get("status", 1)))
 
     @property
     def is_enabled(self) -> bool:
@@ -27,22 +27,25 @@ class Host:
 """Interface Model"""
 
 
-@dataclass
+@dataclass(slots=True)
 class Interface:
     ip: str
     main: bool
 
     @classmethod
     def from_api(cls, data: Dict[str, Any]) -> "Interface":
-        return cls(
-            ip=data.get("ip", "N/A"),
-            main=data.get("main") == "1",
-        )
+        return cls(data.get("ip", "N/A"), data.get("main") == "1")
 
 
 """Problem Model"""
 
-@dataclass
+# Shared by every problem without hosts; immutable, so sharing it is safe
+NO_HOSTS: Tuple[Host, ...] = ()
+
+_ACKNOWLEDGED = {"1", 1}  # API sends "0"/"1"; 1 also matches True
+
+
+@dataclass(slots=True)
 class Problem:
     eventid: str
     name: str
@@ -50,27 +53,39 @@ class Problem:
     acknowledged: bool
     clock: int
     opdata: Optional[str] = None
-    hosts: List[Host] = field(default_factory=list)
+    hosts: Sequence[Host] = NO_HOSTS
     r_eventid: Optional[str] = None
     r_clock: Optional[int] = None
+    objectid: Optional[str] = None  # triggerid for trigger problems
 
     @classmethod
     def from_api(cls, data: Dict[str, Any]) -> "Problem":
-        hosts_data = data.get("hosts", [])
-        hosts = [Host.from_api(h) for h in hosts_data]
-
+        get = data.get
+        hosts_data = get("hosts")
+        r_clock = get("r_clock")
         return cls(
-            eventid=str(data.get("eventid")),
-            name=data.get("name", "Unknown"),
-            severity=int(data.get("severity", 0)),
-            acknowledged=bool(data.get("acknowledged", False)),
-            clock=int(data.get("clock", 0)),
-            opdata=data.get("opdata"),
-            hosts=hosts,
-            r_eventid=data.get("r_eventid"),
-            r_clock=int(data["r_clock"]) if data.get("r_clock") else None,
+            str(get("eventid")),
+            get("name", "Unknown"),
+            int(get("severity", 0)),
+            get("acknowledged") in _ACKNOWLEDGED,
+            int(get("clock", 0)),
+            get("opdata"),
+            [Host.from_api(h) for h in hosts_data] if hosts_data else NO_HOSTS,
+            get("r_eventid"),
+            int(r_clock) if r_clock else None,
+            get("objectid"),
         )
 
+    @property
+    def state(self) -> tuple:
+        """The fields an operator or Zabbix can change in place on a live problem."""
+        return (self.name, self.severity, self.acknowledged, self.opdata)
+
+    @property
+    def quick_state(self) -> tuple:
+        """The part of state the incremental check fetches: what the bridge renders."""
+        return (self.name, self.severity)
+
     @property
     def is_resolved(self) -> bool:
         return bool(self.r_eventid and self.r_eventid != "0")
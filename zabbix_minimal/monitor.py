@@ -1,21 +1,73 @@
 import time
 import threading
-from typing import List, Dict, Set, Tuple
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Set, Tuple
 from .models import Problem
-from .api import ZabbixClint
+from .api import ZabbixClint, AsyncZabbixClint
+
+
+@dataclass(frozen=True)
+class MonitorSnapshot:
+    """
+    Immutable result of one poll. The monitor swaps in a new one per poll,
+    so a reference obtained from snapshot() never changes underneath you.
+    """
+    problems: Tuple[Problem, ...] = ()  # eventid DESC, like problem.get
+    by_id: Mapping[str, Problem] = field(default_factory=lambda: MappingProxyType({}))
+    new: Tuple[Problem, ...] = ()
+    resolved: Tuple[Problem, ...] = ()
+    changed: Tuple[Problem, ...] = ()  # still active, changed in place
+    full: bool = False                 # a full snapshot rather than a delta
+    taken_at: float = 0.0              # time.time() of the poll
 
 
 class ZabbixMonitor:
     """
     Stateful monitoring service.
     Handles polling and change detection.
+
+    With incremental=True, only problems newer than the last seen eventid are
+    fetched in full, plus a cheap check of every active problem's changeable
+    fields. A full snapshot still runs every full_resync_every cycles as a
+    safety net.
+
+    Besides new and resolved problems, each poll records in last_changed the
+    problems that changed in place: any field of Problem.state on a full
+    snapshot, name or severity (Problem.quick_state) on an incremental poll.
+
+    The Zabbix call runs without holding any lock; only swapping in the new
+    MonitorSnapshot is serialised, and snapshot() never blocks.
     """
 
-    def __init__(self, client: ZabbixClint):
+    def __init__(
+        self,
+        client: ZabbixClint | AsyncZabbixClint,
+        incremental: bool = False,
+        full_resync_every: int = 10,
+    ):
         self.client = client
-        self._previous_problems: Dict[str, Problem] = {}
-        self._lock = threading.Lock()
-        self._running = False
+        self.incremental = incremental
+        self.full_resync_every = full_resync_every
+        self._snapshot = MonitorSnapshot()
+        self._lock = threading.Lock()  # serialises snapshot swaps, never held across I/O
+        self._stop = threading.Event()
+        self._synced = False
+        self._cycles_since_resync = 0
+
+    def snapshot(self) -> MonitorSnapshot:
+        """The latest poll result. Lock-free: safe from any thread at any time."""
+        return self._snapshot
+
+    @property
+    def last_poll_full(self) -> bool:
+        """Whether the last poll was a full snapshot rather than a delta."""
+        return self._snapshot.full
+
+    @property
+    def last_changed(self) -> List[Problem]:
+        """Still-active problems whose state changed during the last poll."""
+        return list(self._snapshot.changed)
 
     """
     Core Polling Logic
@@ -26,47 +78,154 @@ class ZabbixMonitor:
         Performs a single poll cycle.
         Returns: (new_problems, resolved_problems, current_problems)
         """
-        with self._lock:
-            current_problems = self.client.get_current_problems()
-            current_map = {p.eventid: p for p in current_problems}
+        if self._incremental_due():
+            new_problems, resolved_ids, known_states = self.client.get_problem_changes(
+                set(self._snapshot.by_id), self._next_eventid())
+            with self._lock:
+                return self._apply_changes(new_problems, resolved_ids, known_states)
 
-            current_ids = set(current_map.keys())
-            previous_ids = set(self._previous_problems.keys())
-
-            new_ids = current_ids - previous_ids
-            resolved_ids = previous_ids - current_ids
-
-            new_problems = [current_map[eid] for eid in new_ids]
-            resolved_problems = [self._previous_problems[eid]
-                                 for eid in resolved_ids]
+        current_problems = self.client.get_current_problems()
+        with self._lock:
+            return self._apply(current_problems)
 
-            # Update state
-            self._previous_problems = current_map
+    async def poll_once_async(self) -> Tuple[List[Problem], List[Problem], List[Problem]]:
+        """
+        Same as poll_once, for an AsyncZabbixClint.
+        The fetch is awaited so the event loop keeps running meanwhile.
+        """
+        if self._incremental_due():
+            new_problems, resolved_ids, known_states = await self.client.get_problem_changes(
+                set(self._snapshot.by_id), self._next_eventid())
+            with self._lock:
+                return self._apply_changes(new_problems, resolved_ids, known_states)
 
-            return new_problems, resolved_problems, current_problems
+        current_problems = await self.client.get_current_problems()
+        with self._lock:
+            return self._apply(current_problems)
+
+    def _incremental_due(self) -> bool:
+        """True when this cycle may use an incremental fetch instead of a full one."""
+        return (
+            self.incremental
+            and self._synced
+            and self._cycles_since_resync < self.full_resync_every
+        )
+
+    def _next_eventid(self) -> str:
+        """Lowest eventid that has not been seen yet."""
+        return str(max((int(eid) for eid in self._snapshot.by_id), default=0) + 1)
+
+    def _publish(
+        self,
+        current_map: Dict[str, Problem],
+        current_problems: List[Problem],
+        new_problems: List[Problem],
+        resolved_problems: List[Problem],
+        changed: List[Problem],
+        full: bool,
+    ) -> Tuple[List[Problem], List[Problem], List[Problem]]:
+        """Swap in the new snapshot; callers hold self._lock."""
+        self._snapshot = MonitorSnapshot(
+            problems=tuple(current_problems),
+            by_id=MappingProxyType(current_map),
+            new=tuple(new_problems),
+            resolved=tuple(resolved_problems),
+            changed=tuple(changed),
+            full=full,
+            taken_at=time.time(),
+        )
+        return new_problems, resolved_problems, current_problems
+
+    def _apply_changes(
+        self,
+        new_problems: List[Problem],
+        resolved_ids: Set[str],
+        known_states: Dict[str, Problem] | None = None,
+    ) -> Tuple[List[Problem], List[Problem], List[Problem]]:
+        """Apply an incremental delta to the previous snapshot."""
+        current_map = dict(self._snapshot.by_id)
+
+        resolved_problems = [current_map.pop(eid) for eid in resolved_ids if eid in current_map]
+        new_problems = [p for p in new_problems if p.eventid not in current_map]
+
+        # Known problems only came back as partial objects: carry the changed
+        # fields over, keeping hosts and everything else from the full copy
+        changed = []
+        for eid, partial in (known_states or {}).items():
+            previous = current_map.get(eid)
+            if previous is not None and previous.quick_state != partial.quick_state:
+                current_map[eid] = replace(
+                    previous,
+                    name=partial.name,
+                    severity=partial.severity,
+                )
+                changed.append(current_map[eid])
+        for problem in new_problems:
+            current_map[problem.eventid] = problem
+
+        # Keep the same ordering as problem.get (eventid DESC)
+        current_problems = sorted(current_map.values(), key=lambda p: int(p.eventid), reverse=True)
+
+        self._cycles_since_resync += 1
+        return self._publish(
+            current_map, current_problems, new_problems, resolved_problems, changed, full=False)
+
+    def _apply(self, current_problems: List[Problem]) -> Tuple[List[Problem], List[Problem], List[Problem]]:
+        """Diff a fresh snapshot against the previous one and store it."""
+        previous_map = self._snapshot.by_id
+        current_map = {p.eventid: p for p in current_problems}
+
+        current_ids = set(current_map.keys())
+        previous_ids = set(previous_map.keys())
+
+        new_ids = current_ids - previous_ids
+        resolved_ids = previous_ids - current_ids
+
+        new_problems = [current_map[eid] for eid in new_ids]
+        resolved_problems = [previous_map[eid]
+                             for eid in resolved_ids]
+        changed = [
+            current_map[eid] for eid in current_ids & previous_ids
+            if current_map[eid].state != previous_map[eid].state
+        ]
+
+        self._synced = True
+        self._cycles_since_resync = 1
+        return self._publish(
+            current_map, current_problems, new_problems, resolved_problems, changed, full=True)
 
     def start_polling(self, interval: int, callback, on_change_only: bool = False):
         """
         interval: seconds
         callback: function(current, new, resolved)
-        on_change_only: if True, only calls the callback when there are new or resolved problems.
+        on_change_only: if True, only calls the callback when there are new, resolved
+        or changed problems.
+
+        Polls run on a fixed cadence (every interval seconds from the start),
+        not interval seconds after the previous poll finished. A poll that
+        overruns skips the ticks it missed instead of firing them back to back.
         """
-        self._running = True
+        self._stop.clear()
+        next_run = time.monotonic()
 
-        while self._running:
+        while not self._stop.is_set():
             try:
                 # Fixed the unpacking order: poll_once returns (new, resolved, current)
                 new, resolved, current = self.poll_once()
 
                 if callback:
-                    if not on_change_only or new or resolved:
+                    if not on_change_only or new or resolved or self.last_changed:
                         callback(current, new, resolved)
 
             except Exception:
                 # Let upper layers decide logging strategy
                 pass
 
-            time.sleep(interval)
+            next_run += interval
+            now = time.monotonic()
+            if next_run < now:
+                next_run += ((now - next_run) // interval + 1) * interval
+            self._stop.wait(next_run - now)
 
     def stop(self):
-        self._running = False
+        self._stop.set()
@@ -0,0 +1,176 @@
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, int]  # (channel_config_id, severity)
+
+
+class TrackingStore:
+    """
+    Message tracking and group fingerprints for DiscordBridge, on one
+    long-lived SQLite connection in WAL mode.
+
+    The bridge is the only writer, so tracking is read from SQLite once and
+    then served from memory. Changes are staged per (channel, severity) and
+    written write-behind by flush() (in a worker thread) or commit(): many
+    changes to one group between writes become a single write, and each
+    write is one transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()  # the connection is shared with flush()'s thread
+        # key → tracked message IDs, loaded on first use
+        self._messages: Dict[Key, List[int]] | None = None
+        # Not yet written: key → full list of tracked message IDs
+        self._pending_messages: Dict[Key, List[int]] = {}
+        # Not yet written: key → fingerprint, or None to drop it
+        self._pending_fingerprints: Dict[Key, str | None] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS message_fingerprints ("
+                "channel_config_id INTEGER NOT NULL, "
+                "severity INTEGER NOT NULL, "
+                "fingerprint TEXT NOT NULL, "
+                "PRIMARY KEY (channel_config_id, severity))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_message_tracking_channel_severity "
+                "ON message_tracking (channel_config_id, severity)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def fetch_all(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Run a read query on the shared connection."""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def data_version(self) -> int:
+        """Changes whenever another connection (e.g. the dashboard) commits."""
+        return self.fetch_all("PRAGMA data_version")[0][0]
+
+    # ── Message tracking ───────────────────────────────────────────────────────
+
+    def _load_messages(self) -> Dict[Key, List[int]]:
+        if self._messages is None:
+            rows = self.fetch_all(
+                "SELECT channel_config_id, severity, discord_message_id "
+                "FROM message_tracking ORDER BY id"
+            )
+            messages: Dict[Key, List[int]] = {}
+            for r in rows:
+                key = (r["channel_config_id"], r["severity"])
+                messages.setdefault(key, []).append(int(r["discord_message_id"]))
+            self._messages = messages
+        return self._messages
+
+    def get_messages(self, channel_config_id: int, severity: int) -> List[int]:
+        """Discord message IDs tracked for this (channel, severity), in order."""
+        return list(self._load_messages().get((channel_config_id, severity), []))
+
+    def set_messages(self, channel_config_id: int, severity: int, message_ids: List[int]):
+        """Replace the tracked message IDs for this (channel, severity)."""
+        key = (channel_config_id, severity)
+        message_ids = list(message_ids)
+        messages = self._load_messages()
+        if message_ids:
+            messages[key] = message_ids
+        else:
+            messages.pop(key, None)
+        self._pending_messages[key] = message_ids
+
+    # ── Group fingerprints ─────────────────────────────────────────────────────
+
+    def load_fingerprints(self) -> Dict[Key, str]:
+        rows = self.fetch_all(
+            "SELECT channel_config_id, severity, fingerprint FROM message_fingerprints"
+        )
+        return {(r["channel_config_id"], r["severity"]): r["fingerprint"] for r in rows}
+
+    def set_fingerprint(self, channel_config_id: int, severity: int, fingerprint: str | None):
+        """Stage a group fingerprint; None removes it."""
+        self._pending_fingerprints[(channel_config_id, severity)] = fingerprint
+
+    # ── Writing ────────────────────────────────────────────────────────────────
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending_messages or self._pending_fingerprints)
+
+    def _take_pending(self):
+        messages, self._pending_messages = self._pending_messages, {}
+        fingerprints, self._pending_fingerprints = self._pending_fingerprints, {}
+        return messages, fingerprints
+
+    def _restore_pending(self, messages, fingerprints):
+        # Keep the changes for the next write; anything staged since wins
+        self._pending_messages = {**messages, **self._pending_messages}
+        self._pending_fingerprints = {**fingerprints, **self._pending_fingerprints}
+
+    def commit(self):
+        """Write every staged change now, in one transaction."""
+        if not self.dirty:
+            return
+        messages, fingerprints = self._take_pending()
+        try:
+            self._write(messages, fingerprints)
+        except sqlite3.Error:
+            self._restore_pending(messages, fingerprints)
+            raise
+
+    async def flush(self):
+        """Like commit(), but the write runs in a worker thread."""
+        if not self.dirty:
+            return
+        messages, fingerprints = self._take_pending()
+        try:
+            await asyncio.to_thread(self._write, messages, fingerprints)
+        except sqlite3.Error:
+            self._restore_pending(messages, fingerprints)
+            raise
+
+    def _write(self, messages: Dict[Key, List[int]], fingerprints: Dict[Key, str | None]):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM message_tracking WHERE channel_config_id = ? AND severity = ?",
+                list(messages),
+            )
+            self.conn.executemany(
+                "INSERT INTO message_tracking (channel_config_id, severity, discord_message_id) "
+                "VALUES (?, ?, ?)",
+                [(cid, sev, str(m)) for (cid, sev), ids in messages.items() for m in ids],
+            )
+            self.conn.executemany(
+                "DELETE FROM message_fingerprints WHERE channel_config_id = ? AND severity = ?",
+                [key for key, fp in fingerprints.items() if fp is None],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO message_fingerprints "
+                "(channel_config_id, severity, fingerprint) VALUES (?, ?, ?)",
+                [(cid, sev, fp) for (cid, sev), fp in fingerprints.items() if fp is not None],
+            )
+        logger.debug(
+            f"Wrote tracking for {len(messages)} group(s), {len(fingerprints)} fingerprint(s)"
+        )
+
+    def close(self):
+        """Write anything still pending, then close the connection."""
+        if self._conn is not None:
+            self.commit()
+            with self._lock:
+                self._conn.close()
+                self._conn = None